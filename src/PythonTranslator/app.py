@@ -1,13 +1,63 @@
 """
 API Flask para processamento e tradução da gramática latina
 """
+import functools
 import os
-from flask import Flask, request, jsonify
+import threading
+from typing import Optional
+import orjson
+from flask import Flask, request, jsonify, stream_with_context
+from flask.json.provider import JSONProvider
 from html_parser import LatinGrammarParser
+from logging_setup import setup_queue_logging
 from translator_factory import TranslatorFactory
-from models import ParsedDocument
+from translation_strategy import SectionTranslator
+from section_batcher import BatchingTranslator
+from models import ParsedDocument, ParsedNode
+from pydantic import TypeAdapter
+
+
+class OrjsonProvider(JSONProvider):
+    """Provider JSON do Flask usando orjson (serialização em C, sem ordenar chaves)"""
+
+    def dumps(self, obj, **kwargs) -> str:
+        """
+        Serializa com orjson, aceitando os kwargs de json.dumps que ele suporta
+
+        Args:
+            obj: Objeto a serializar
+            **kwargs: default, sort_keys, indent (qualquer indent vira 2
+                espaços, o único do orjson) e separators compactos (sessão do
+                Flask); outros levantam TypeError
+        """
+        default = kwargs.pop("default", None)
+        option = orjson.OPT_NON_STR_KEYS
+        if kwargs.pop("sort_keys", False):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.pop("indent", None):
+            option |= orjson.OPT_INDENT_2
+        if tuple(kwargs.get("separators") or (",", ":")) == (",", ":"):
+            kwargs.pop("separators", None)  # orjson já é compacto
+        if kwargs:
+            raise TypeError(f"Argumentos não suportados pelo orjson: {', '.join(sorted(kwargs))}")
+        return orjson.dumps(obj, default=default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Evita o decode/encode intermediário: orjson já produz bytes UTF-8
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        return self._app.response_class(body, mimetype="application/json")
+
+
+# Logs da aplicação saem por uma thread de fundo, fora da thread da requisição
+setup_queue_logging(os.getenv("LOG_LEVEL", "INFO"))
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
+app.config['PROPAGATE_EXCEPTIONS'] = True
 parser = LatinGrammarParser()
 
 # Configuração do tradutor via variáveis de ambiente
@@ -15,6 +65,112 @@ TRANSLATOR_PROVIDER = os.getenv("TRANSLATOR_PROVIDER", "gemini")
 TRANSLATOR_API_KEY = os.getenv("TRANSLATOR_API_KEY", "")
 TRANSLATOR_MODEL = os.getenv("TRANSLATOR_MODEL")  # None usa padrão do provider
 
+# Saída estruturada nativa do provedor (JSON garantido, menos retries por parse)
+TRANSLATOR_STRUCTURED_OUTPUT = os.getenv("TRANSLATOR_STRUCTURED_OUTPUT", "false").lower() in ("1", "true", "yes")
+
+# Micro-batching: seções de requisições concorrentes viram uma única chamada à IA
+TRANSLATOR_BATCH_MAX_SEGMENTS = int(os.getenv("TRANSLATOR_BATCH_MAX_SEGMENTS", "40"))
+TRANSLATOR_BATCH_WAIT_MS = int(os.getenv("TRANSLATOR_BATCH_WAIT_MS", "50"))
+
+_translator_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=32)
+def _cached_translator(provider: str, api_key: str, model_name: Optional[str]) -> BatchingTranslator:
+    """
+    Cria o tradutor (com batcher) uma única vez por provedor/chave/modelo
+
+    O Gemini aceita uma única API key por processo (genai.configure é
+    global): pedir outra chave do Gemini levanta ValueError.
+    """
+    strategy = TranslatorFactory.create(
+        provider=provider,
+        api_key=api_key,
+        model_name=model_name,
+        structured_output=TRANSLATOR_STRUCTURED_OUTPUT
+    )
+    return BatchingTranslator(
+        strategy,
+        max_batch_segments=TRANSLATOR_BATCH_MAX_SEGMENTS,
+        max_wait_ms=TRANSLATOR_BATCH_WAIT_MS
+    )
+
+
+def get_translator(
+    provider: str = TRANSLATOR_PROVIDER,
+    api_key: str = TRANSLATOR_API_KEY,
+    model_name: Optional[str] = TRANSLATOR_MODEL
+) -> BatchingTranslator:
+    """
+    Retorna o tradutor compartilhado entre requisições
+
+    Args:
+        provider: Provedor de IA (padrão: TRANSLATOR_PROVIDER)
+        api_key: Chave da API (padrão: TRANSLATOR_API_KEY)
+        model_name: Modelo (padrão: TRANSLATOR_MODEL)
+
+    Returns:
+        BatchingTranslator em cache para a combinação
+    """
+    # Lock evita dois batchers (e duas threads) para a mesma chave
+    with _translator_lock:
+        return _cached_translator(provider, api_key, model_name)
+
+
+def _document_response(doc: ParsedDocument):
+    """Serializa o documento direto para JSON (sem o dict intermediário do model_dump)"""
+    return app.response_class(doc.model_dump_json(), status=200, mimetype="application/json")
+
+
+# ParsedNode é dataclass: serialização via TypeAdapter (mesmo JSON do documento)
+_NODE_ADAPTER = TypeAdapter(ParsedNode)
+
+
+def _wants_ndjson() -> bool:
+    """Cliente pediu resposta em streaming (?stream=1 ou Accept: application/x-ndjson)"""
+    if request.args.get("stream", "").lower() in ("1", "true"):
+        return True
+    return request.accept_mimetypes.best == "application/x-ndjson"
+
+
+def _ndjson_translation(translator: SectionTranslator, parsed_doc: ParsedDocument):
+    """
+    Gera a tradução como NDJSON, uma linha por parte do documento
+
+    Só a linha "meta" sai antes da tradução: o documento é uma única seção
+    (uma chamada à IA), então o primeiro nó só é enviado depois que o
+    documento inteiro foi traduzido. O ganho do streaming está na
+    serialização: cada nó vira JSON e é enviado separadamente, sem montar a
+    resposta inteira numa única string.
+
+    Linhas:
+        {"type": "meta", ...}  - cabeçalho, enviado antes da tradução começar
+        {"type": "node", "node": {...}}  - cada nó de primeiro nível traduzido
+        {"type": "end", "sections": {...}, "footnotes": {...}}
+        {"type": "error", "error": "..."}  - falha depois do início da resposta
+    """
+    yield orjson.dumps({
+        "type": "meta",
+        "title": parsed_doc.title,
+        "encoding": parsed_doc.encoding,
+        "original_filename": parsed_doc.original_filename,
+        "css_file": parsed_doc.css_file,
+        "stats": parsed_doc.stats
+    }) + b"\n"
+
+    try:
+        translator.translate_document(parsed_doc)
+    except Exception as e:
+        yield orjson.dumps({"type": "error", "error": str(e)}) + b"\n"
+        return
+
+    # Serializar nó a nó: o documento inteiro nunca vira uma única string
+    for node in parsed_doc.nodes:
+        yield b'{"type":"node","node":' + _NODE_ADAPTER.dump_json(node) + b"}\n"
+
+    tail = parsed_doc.model_dump_json(include={"sections", "footnotes"})
+    yield b'{"type":"end",' + tail[1:].encode() + b"\n"
+
 
 @app.route("/parse-html", methods=["POST"])
 def parse_html():
@@ -46,10 +202,7 @@ def parse_html():
         # Parsear HTML
         parsed_doc = parser.parse_html(html_content, filename)
 
-        # Converter para dict (Pydantic model_dump)
-        result = parsed_doc.model_dump()
-
-        return jsonify(result), 200
+        return _document_response(parsed_doc)
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -85,6 +238,11 @@ def translate():
         "nodes": [...],  // com textos traduzidos
         "stats": {...}
     }
+
+    Com ?stream=1 ou Accept: application/x-ndjson a resposta é NDJSON
+    (ver _ndjson_translation). Os nós só começam a sair depois da tradução
+    do documento inteiro; o streaming evita montar a resposta numa única
+    string, não antecipa o primeiro nó.
     """
     try:
         data = request.get_json()
@@ -108,28 +266,30 @@ def translate():
         # Opção 2: Se recebeu ParsedDocument já parseado
         else:
             try:
-                parsed_doc = ParsedDocument(**data)
+                # Validar direto do corpo bruto (parser JSON do pydantic-core)
+                parsed_doc = ParsedDocument.model_validate_json(request.get_data())
             except Exception as e:
                 return jsonify({
                     "error": f"Formato inválido. Esperado 'html' ou ParsedDocument válido. Erro: {str(e)}"
                 }), 400
 
-        # Criar tradutor
+        # Obter tradutor (compartilhado entre requisições via batcher)
         try:
-            translator = TranslatorFactory.create(
-                provider=TRANSLATOR_PROVIDER,
-                api_key=TRANSLATOR_API_KEY,
-                model_name=TRANSLATOR_MODEL
-            )
+            translator = SectionTranslator(get_translator())
         except ValueError as e:
             return jsonify({"error": str(e)}), 500
 
+        # Resposta em streaming (NDJSON): só o cabeçalho sai antes da tradução
+        if _wants_ndjson():
+            return app.response_class(
+                stream_with_context(_ndjson_translation(translator, parsed_doc)),
+                mimetype="application/x-ndjson"
+            )
+
         # Traduzir documento
         translated_doc = translator.translate_document(parsed_doc)
 
-        # Converter para dict e retornar
-        result = translated_doc.model_dump()
-        return jsonify(result), 200
+        return _document_response(translated_doc)
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -156,4 +316,5 @@ def stats():
 
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5001, debug=True)
+    # Servidor de desenvolvimento. Em produção use: gunicorn -k gevent wsgi:app
+    app.run(host="0.0.0.0", port=5001)
@@ -2,19 +2,114 @@
 Implementação de tradução usando Anthropic Claude API
 """
 import anthropic
-import json
-from typing import Dict, Optional
+import asyncio
+import functools
+import httpx
+import logging
+import weakref
+from typing import Dict, List, Optional
 from translation_strategy import TranslationStrategy, SectionData, TranslationResult
+from parse_utils import translation_response_schema, StreamingTranslationParser
+from rate_limit import get_limiter, estimate_tokens, retry_on
+
+logger = logging.getLogger(__name__)
+
+
+# Erros transitórios: limite de taxa, sobrecarga (529) e falhas de rede/servidor
+RETRYABLE_ERRORS = (
+    anthropic.RateLimitError,
+    anthropic.InternalServerError,
+    anthropic.APIConnectionError,
+)
+
+# Erros de limite de taxa (429): reduzem a concorrência no modo adaptativo
+RATE_LIMIT_ERRORS = (anthropic.RateLimitError,)
+
+# Ferramenta obrigatória no modo estruturado: a entrada dela é a resposta
+SUBMIT_TOOL_NAME = "submit_translations"
+
+
+@functools.lru_cache(maxsize=8)
+def _client(api_key: str) -> anthropic.Anthropic:
+    """
+    Cliente compartilhado por API key
+
+    Reaproveita o pool de conexões (keep-alive + HTTP/2) entre tradutores, em
+    vez de refazer o handshake TLS a cada instância.
+    """
+    return anthropic.Anthropic(
+        api_key=api_key,
+        max_retries=0,  # Retry fica a cargo de retry_on (com rate limit)
+        http_client=anthropic.DefaultHttpxClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=25),
+            timeout=httpx.Timeout(600.0, connect=5.0)  # Respostas longas levam minutos
+        )
+    )
+
+
+# Clientes assíncronos por event loop: conexões async não podem trocar de loop.
+# Fechados por ClaudeTranslator.aclose() antes do fim do loop
+_async_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def _async_client(api_key: str) -> anthropic.AsyncAnthropic:
+    """Cliente assíncrono compartilhado por API key dentro do event loop atual"""
+    clients = _async_clients.setdefault(asyncio.get_running_loop(), {})
+    if api_key not in clients:
+        clients[api_key] = anthropic.AsyncAnthropic(
+            api_key=api_key,
+            max_retries=0,
+            http_client=anthropic.DefaultAsyncHttpxClient(
+                http2=True,
+                limits=httpx.Limits(max_connections=50, max_keepalive_connections=25),
+                timeout=httpx.Timeout(600.0, connect=5.0)
+            )
+        )
+    return clients[api_key]
+
+
+async def _close_async_clients():
+    """Fecha os clientes assíncronos do event loop atual (pools HTTP/2 e sockets)"""
+    clients = _async_clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        await client.close()
+
+
+@functools.lru_cache(maxsize=1)
+def _submit_tool() -> Dict:
+    """Definição da ferramenta submit_translations (schema de TranslationPayload)"""
+    return {
+        "name": SUBMIT_TOOL_NAME,
+        "description": "Envia a tradução de todos os segmentos da seção",
+        "input_schema": translation_response_schema()
+    }
+
+
+def _response_delta(event) -> Optional[str]:
+    """Trecho da resposta trazido pelo evento (texto ou JSON parcial da ferramenta)"""
+    if event.type == "text":
+        return event.text
+    if event.type == "input_json":
+        return event.partial_json
+    return None
 
 
 class ClaudeTranslator(TranslationStrategy):
     """Tradutor usando Anthropic Claude API"""
 
+    log_label = "Claude"
+    rate_limit_errors = RATE_LIMIT_ERRORS
+
     def __init__(
         self,
         api_key: str,
         model_name: str = "claude-3-5-sonnet-20241022",
-        glossary: Optional[Dict[str, str]] = None
+        glossary: Optional[Dict[str, str]] = None,
+        glossary_text: Optional[str] = None,
+        glossary_hash: Optional[str] = None,
+        structured_output: bool = False,
+        glossary_index: Optional[Dict[str, str]] = None
     ):
         """
         Inicializa tradutor Claude
@@ -23,10 +118,16 @@ class ClaudeTranslator(TranslationStrategy):
             api_key: Chave da API Claude
             model_name: Nome do modelo
             glossary: Glossário customizado (usa padrão se None)
+            glossary_text: Glossário já formatado (opcional, vem da factory)
+            glossary_hash: Hash do glossário para o cache (opcional, vem da factory)
+            structured_output: Resposta via tool use obrigatório (JSON validado pela API)
+            glossary_index: Índice de busca do glossário (opcional, vem da factory)
         """
-        super().__init__(api_key, glossary)
+        super().__init__(
+            api_key, glossary, glossary_text, glossary_hash, structured_output, glossary_index
+        )
 
-        self.client = anthropic.Anthropic(api_key=api_key)
+        self.client = _client(api_key)
         self.model_name = model_name
 
     def get_provider_name(self) -> str:
@@ -42,102 +143,110 @@ class ClaudeTranslator(TranslationStrategy):
         Returns:
             Resultado da tradução
         """
-        try:
-            # Criar prompt
-            prompt = self._create_section_prompt(section)
-
-            print(f"[Claude] Enviando {len(section.segments_to_translate)} segmentos...")
-            print(f"[Claude] Tamanho do prompt: ~{len(prompt)} caracteres")
-
-            # Enviar para Claude
-            response = self.client.messages.create(
-                model=self.model_name,
-                max_tokens=8192,
-                temperature=0.3,  # Baixa criatividade para consistência
-                messages=[
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ]
-            )
-
-            # Extrair resposta
-            response_text = response.content[0].text
-
-            # Tokens usados
-            tokens_used = response.usage.input_tokens + response.usage.output_tokens
-            print(f"[Claude] Tokens usados: {tokens_used} (input: {response.usage.input_tokens}, output: {response.usage.output_tokens})")
-
-            # Parsear resposta JSON
-            translated_segments = self._parse_response(response_text)
-
-            if not translated_segments:
-                return TranslationResult(
-                    success=False,
-                    translated_segments={},
-                    error_message="Falha ao parsear resposta JSON",
-                    provider=self.get_provider_name()
-                )
+        return self._run_section(section, self._stream_response)
 
-            print(f"[Claude] Sucesso! {len(translated_segments)} segmentos traduzidos")
-
-            return TranslationResult(
-                success=True,
-                translated_segments=translated_segments,
-                tokens_used=tokens_used,
-                provider=self.get_provider_name()
-            )
+    async def translate_section_async(self, section: SectionData) -> TranslationResult:
+        """
+        Traduz seção completa usando o cliente assíncrono do Claude
 
-        except Exception as e:
-            error_msg = f"Erro no Claude: {str(e)}"
-            print(f"[ERRO] {error_msg}")
+        Args:
+            section: Dados da seção
 
-            return TranslationResult(
-                success=False,
-                translated_segments={},
-                error_message=error_msg,
-                provider=self.get_provider_name()
-            )
+        Returns:
+            Resultado da tradução
+        """
+        return await self._run_section_async(section, self._stream_response_async)
 
-    def _parse_response(self, response_text: str) -> Optional[Dict[str, str]]:
+    @retry_on(RETRYABLE_ERRORS, label="Claude", rate_limit_errors=RATE_LIMIT_ERRORS)
+    def _stream_response(self, prompt: str, expected: List[str], on_item=None):
         """
-        Parseia resposta JSON do modelo
+        Envia o prompt respeitando o rate limit e lê a resposta em streaming
 
         Args:
-            response_text: Texto da resposta
+            prompt: Prompt completo
+            expected: IDs dos segmentos enviados
+            on_item: Callback (id, tradução) chamado durante o streaming
 
         Returns:
-            Dicionário {id: texto_traduzido} ou None se falhar
+            (parser com as traduções, uso de tokens)
+        """
+        get_limiter("claude").acquire(estimate_tokens(prompt))
+
+        parser = StreamingTranslationParser(expected, on_item)
+        with self.client.messages.stream(**self._request_args(prompt)) as stream:
+            for event in stream:
+                delta = _response_delta(event)
+                if delta and parser.feed(delta):
+                    break  # Todos os segmentos chegaram
+            message = stream.current_message_snapshot
+            parser.truncated = message.stop_reason == "max_tokens"
+            return parser, message.usage
+
+    @retry_on(RETRYABLE_ERRORS, label="Claude", rate_limit_errors=RATE_LIMIT_ERRORS)
+    async def _stream_response_async(self, prompt: str, expected: List[str], on_item=None):
+        """Versão assíncrona de _stream_response"""
+        await get_limiter("claude").acquire_async(estimate_tokens(prompt))
+
+        parser = StreamingTranslationParser(expected, on_item)
+        client = _async_client(self.api_key)
+        async with client.messages.stream(**self._request_args(prompt)) as stream:
+            async for event in stream:
+                delta = _response_delta(event)
+                if delta and parser.feed(delta):
+                    break
+            message = stream.current_message_snapshot
+            parser.truncated = message.stop_reason == "max_tokens"
+            return parser, message.usage
+
+    async def aclose(self):
+        """Fecha os clientes assíncronos do Claude criados no event loop atual"""
+        await _close_async_clients()
+
+    def _request_args(self, prompt: str) -> Dict:
+        """Parâmetros de messages.stream (iguais no cliente síncrono e assíncrono)"""
+        args = {
+            "model": self.model_name,
+            "max_tokens": 8192,
+            "temperature": 0.3,  # Baixa criatividade para consistência
+            "messages": [
+                {
+                    "role": "user",
+                    "content": self._prompt_blocks(prompt)
+                }
+            ]
+        }
+        if self.structured_output:
+            # Tool use obrigatório: a API entrega a entrada da ferramenta como
+            # JSON no schema de TranslationPayload, sem texto em volta
+            args["tools"] = [_submit_tool()]
+            args["tool_choice"] = {"type": "tool", "name": SUBMIT_TOOL_NAME}
+        return args
+
+    def _prompt_blocks(self, prompt: str) -> List[Dict]:
+        """
+        Divide o prompt em prefixo estático + parte da seção
+
+        O prefixo (instruções + glossário) é igual em todas as chamadas e vai
+        marcado com cache_control: a Anthropic guarda esse trecho e cobra as
+        leituras seguintes com desconto. Prefixos menores que o mínimo do
+        modelo simplesmente não são cacheados.
         """
-        try:
-            # Remover markdown code blocks se existirem
-            cleaned = response_text.strip()
-
-            # Remover ```json e ``` se presentes
-            if cleaned.startswith("```"):
-                # Encontrar primeiro { e último }
-                start = cleaned.find("{")
-                end = cleaned.rfind("}") + 1
-                if start != -1 and end > start:
-                    cleaned = cleaned[start:end]
-
-            # Parsear JSON
-            data = json.loads(cleaned)
-
-            # Extrair traduções
-            translations = {}
-            if "translations" in data:
-                for item in data["translations"]:
-                    if "id" in item and "translated" in item:
-                        translations[item["id"]] = item["translated"]
-
-            return translations if translations else None
-
-        except json.JSONDecodeError as e:
-            print(f"[ERRO] Falha ao parsear JSON: {str(e)}")
-            print(f"[DEBUG] Resposta recebida: {response_text[:500]}...")
-            return None
-        except Exception as e:
-            print(f"[ERRO] Erro ao processar resposta: {str(e)}")
-            return None
+        prefix = self._prompt_prefix
+        if not prompt.startswith(prefix):
+            return [{"type": "text", "text": prompt}]
+        return [
+            {"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": prompt[len(prefix):]}
+        ]
+
+    def _tokens_used(self, usage) -> Optional[int]:
+        """Tokens da chamada (output parcial se a leitura parou antes do fim)"""
+        tokens_used = usage.input_tokens + usage.output_tokens
+        logger.debug(
+            "[Claude] Tokens usados: %d (input: %d, output: %d)",
+            tokens_used, usage.input_tokens, usage.output_tokens
+        )
+        cache_read = getattr(usage, "cache_read_input_tokens", None)
+        if cache_read:
+            logger.debug("[Claude] Prefixo lido do cache do provedor: %d tokens", cache_read)
+        return tokens_used
@@ -2,20 +2,172 @@
 Implementação de tradução usando Google Gemini API
 """
 import google.generativeai as genai
-import json
-import re
-from typing import Dict, Optional
+import asyncio
+import datetime
+import functools
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
 from translation_strategy import TranslationStrategy, SectionData, TranslationResult
+from parse_utils import translation_response_schema, StreamingTranslationParser
+from rate_limit import get_limiter, estimate_tokens, retry_on
+from google.api_core import exceptions as google_exceptions
+
+logger = logging.getLogger(__name__)
+
+
+# Erros transitórios: cota excedida (429) e indisponibilidade do serviço
+RETRYABLE_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.TooManyRequests,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.InternalServerError,
+)
+
+# Erros de limite de taxa (429): reduzem a concorrência no modo adaptativo
+RATE_LIMIT_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.TooManyRequests,
+)
+
+
+# Configuração de segurança (permite conteúdo educacional)
+SAFETY_SETTINGS = [
+    {
+        "category": "HARM_CATEGORY_HARASSMENT",
+        "threshold": "BLOCK_NONE"
+    },
+    {
+        "category": "HARM_CATEGORY_HATE_SPEECH",
+        "threshold": "BLOCK_NONE"
+    },
+    {
+        "category": "HARM_CATEGORY_SEXUALLY_EXPLICIT",
+        "threshold": "BLOCK_NONE"
+    },
+    {
+        "category": "HARM_CATEGORY_DANGEROUS_CONTENT",
+        "threshold": "BLOCK_NONE"
+    }
+]
+
+# Configuração de geração
+GENERATION_CONFIG = {
+    "temperature": 0.3,  # Baixa criatividade (mais consistente)
+    "top_p": 0.95,
+    "top_k": 40,
+    "max_output_tokens": 8192,
+}
+
+# Validade do prefixo (instruções + glossário) no cache de contexto do Gemini,
+# em segundos; 0 (padrão) desativa e o prompt vai sempre completo. O cache
+# explícito tem custo de armazenamento por hora: ligue só se compensar
+GEMINI_PREFIX_CACHE_TTL = int(os.getenv("GEMINI_PREFIX_CACHE_TTL", "0"))
+
+# Tamanho mínimo aceito pelo Gemini para cache explícito (depende do modelo);
+# prefixos menores nem tentam criar o cache
+GEMINI_PREFIX_CACHE_MIN_TOKENS = int(os.getenv("GEMINI_PREFIX_CACHE_MIN_TOKENS", "4096"))
+
+# Folga antes do vencimento: o cache é recriado antes de expirar no servidor
+_PREFIX_CACHE_MARGIN = 60.0
+
+_configured_api_key: Optional[str] = None
+_configure_lock = threading.Lock()
+
+# (modelo, hash do glossário, modo estruturado) -> (modelo ligado ao cache, vence em)
+# ou None se o provedor recusou o cache (ex: prefixo abaixo do mínimo de tokens)
+_prefix_models: Dict[Tuple[str, str, bool], Optional[Tuple[genai.GenerativeModel, float]]] = {}
+_prefix_lock = threading.Lock()
+
+
+def _configure(api_key: str):
+    """
+    Chama genai.configure (estado global do SDK) na primeira vez
+
+    A chave vale para o processo inteiro e o SDK não permite ligá-la a um
+    modelo: trocar de chave com tradutores vivos faria requisições em
+    andamento saírem com a credencial da outra conta. Por isso só uma API
+    key do Gemini é aceita por processo.
+
+    Raises:
+        ValueError: Se outra API key do Gemini já foi configurada
+    """
+    global _configured_api_key
+    if _configured_api_key == api_key:
+        return
+    with _configure_lock:
+        if _configured_api_key is None:
+            genai.configure(api_key=api_key)
+            _configured_api_key = api_key
+        elif _configured_api_key != api_key:
+            raise ValueError(
+                "Gemini aceita uma única API key por processo (genai.configure é global)"
+            )
+
+
+@functools.lru_cache(maxsize=8)
+def _model(model_name: str, structured_output: bool = False) -> genai.GenerativeModel:
+    """GenerativeModel compartilhado por nome de modelo (e modo de resposta)"""
+    return genai.GenerativeModel(
+        model_name=model_name,
+        generation_config=_generation_config(structured_output),
+        safety_settings=SAFETY_SETTINGS
+    )
+
+
+def _generation_config(structured_output: bool) -> Dict:
+    """
+    Configuração de geração; no modo estruturado o Gemini só produz JSON
+    válido no schema de TranslationPayload (response_schema)
+    """
+    if not structured_output:
+        return GENERATION_CONFIG
+    return {
+        **GENERATION_CONFIG,
+        "response_mime_type": "application/json",
+        "response_schema": translation_response_schema(),
+    }
+
+
+def _hit_token_limit(chunk) -> bool:
+    """O chunk encerra a resposta por limite de tokens de saída (MAX_TOKENS)?"""
+    for candidate in getattr(chunk, "candidates", None) or ():
+        reason = getattr(candidate, "finish_reason", None)
+        if getattr(reason, "name", reason) == "MAX_TOKENS":
+            return True
+    return False
+
+
+def _chunk_text(chunk) -> str:
+    """
+    Texto do chunk, vazio se ele não trouxer partes
+
+    chunk.text levanta ValueError em chunks sem partes (ex: o último, com
+    MAX_TOKENS ou SAFETY), o que descartaria tudo o que já chegou.
+    """
+    candidates = getattr(chunk, "candidates", None)
+    if not candidates:
+        return ""
+    return "".join(part.text for part in candidates[0].content.parts if part.text)
 
 
 class GeminiTranslator(TranslationStrategy):
     """Tradutor usando Google Gemini API (Grátis!)"""
 
+    log_label = "Gemini"
+    rate_limit_errors = RATE_LIMIT_ERRORS
+
     def __init__(
         self,
         api_key: str,
         model_name: str = "gemini-3-pro-preview",
-        glossary: Optional[Dict[str, str]] = None
+        glossary: Optional[Dict[str, str]] = None,
+        glossary_text: Optional[str] = None,
+        glossary_hash: Optional[str] = None,
+        structured_output: bool = False,
+        glossary_index: Optional[Dict[str, str]] = None
     ):
         """
         Inicializa tradutor Gemini
@@ -24,44 +176,24 @@ class GeminiTranslator(TranslationStrategy):
             api_key: Chave da API Gemini
             model_name: Nome do modelo (padrão: 'gemini-3-pro-preview')
             glossary: Glossário customizado (usa padrão se None)
+            glossary_text: Glossário já formatado (opcional, vem da factory)
+            glossary_hash: Hash do glossário para o cache (opcional, vem da factory)
+            structured_output: Resposta com response_schema (JSON validado pela API)
+            glossary_index: Índice de busca do glossário (opcional, vem da factory)
         """
-        super().__init__(api_key, glossary)
-
-        # Configurar Gemini
-        genai.configure(api_key=api_key)
-
-        # Configuração de segurança (permite conteúdo educacional)
-        self.safety_settings = [
-            {
-                "category": "HARM_CATEGORY_HARASSMENT",
-                "threshold": "BLOCK_NONE"
-            },
-            {
-                "category": "HARM_CATEGORY_HATE_SPEECH",
-                "threshold": "BLOCK_NONE"
-            },
-            {
-                "category": "HARM_CATEGORY_SEXUALLY_EXPLICIT",
-                "threshold": "BLOCK_NONE"
-            },
-            {
-                "category": "HARM_CATEGORY_DANGEROUS_CONTENT",
-                "threshold": "BLOCK_NONE"
-            }
-        ]
-
-        # Configuração de geração
-        self.generation_config = {
-            "temperature": 0.3,  # Baixa criatividade (mais consistente)
-            "top_p": 0.95,
-            "top_k": 40,
-            "max_output_tokens": 8192,
-        }
-
-        self.model = genai.GenerativeModel(
-            model_name=model_name,
-            generation_config=self.generation_config,
-            safety_settings=self.safety_settings
+        super().__init__(
+            api_key, glossary, glossary_text, glossary_hash, structured_output, glossary_index
+        )
+
+        # Configurar Gemini (global; uma API key por processo)
+        _configure(api_key)
+
+        self.safety_settings = SAFETY_SETTINGS
+        self.generation_config = _generation_config(structured_output)
+        self.model = _model(model_name, structured_output)
+        self._prefix_cacheable = (
+            GEMINI_PREFIX_CACHE_TTL > 0
+            and estimate_tokens(self._prompt_prefix) >= GEMINI_PREFIX_CACHE_MIN_TOKENS
         )
 
         self.model_name = model_name
@@ -79,94 +211,132 @@ class GeminiTranslator(TranslationStrategy):
         Returns:
             Resultado da tradução
         """
-        try:
-            # Criar prompt
-            prompt = self._create_section_prompt(section)
-
-            print(f"[Gemini] Enviando {len(section.segments_to_translate)} segmentos...")
-            print(f"[Gemini] Tamanho do prompt: ~{len(prompt)} caracteres")
-
-            # Enviar para Gemini
-            response = self.model.generate_content(prompt)
-
-            # Extrair tokens usados
-            tokens_used = None
-            if hasattr(response, 'usage_metadata'):
-                tokens_used = (
-                    response.usage_metadata.prompt_token_count +
-                    response.usage_metadata.candidates_token_count
-                )
-                print(f"[Gemini] Tokens usados: {tokens_used}")
+        return self._run_section(section, self._stream_response)
 
-            # Parsear resposta JSON
-            translated_segments = self._parse_response(response.text)
+    async def translate_section_async(self, section: SectionData) -> TranslationResult:
+        """
+        Traduz seção completa usando a API assíncrona do Gemini
 
-            if not translated_segments:
-                return TranslationResult(
-                    success=False,
-                    translated_segments={},
-                    error_message="Falha ao parsear resposta JSON",
-                    provider=self.get_provider_name()
-                )
+        Args:
+            section: Dados da seção
 
-            print(f"[Gemini] Sucesso! {len(translated_segments)} segmentos traduzidos")
+        Returns:
+            Resultado da tradução
+        """
+        return await self._run_section_async(section, self._stream_response_async)
 
-            return TranslationResult(
-                success=True,
-                translated_segments=translated_segments,
-                tokens_used=tokens_used,
-                provider=self.get_provider_name()
-            )
+    @retry_on(RETRYABLE_ERRORS, label="Gemini", rate_limit_errors=RATE_LIMIT_ERRORS)
+    def _stream_response(self, prompt: str, expected: List[str], on_item=None):
+        """
+        Envia o prompt respeitando o rate limit e lê a resposta em streaming
 
-        except Exception as e:
-            error_msg = f"Erro no Gemini: {str(e)}"
-            print(f"[ERRO] {error_msg}")
+        Args:
+            prompt: Prompt completo
+            expected: IDs dos segmentos enviados
+            on_item: Callback (id, tradução) chamado durante o streaming
 
-            return TranslationResult(
-                success=False,
-                translated_segments={},
-                error_message=error_msg,
-                provider=self.get_provider_name()
-            )
+        Returns:
+            (parser com as traduções, usage_metadata do último chunk)
+        """
+        get_limiter("gemini").acquire(estimate_tokens(prompt))
+
+        model, content = self._target(prompt)
+        parser = StreamingTranslationParser(expected, on_item)
+        usage = None
+        for chunk in model.generate_content(content, stream=True):
+            usage = getattr(chunk, 'usage_metadata', None) or usage
+            parser.truncated = parser.truncated or _hit_token_limit(chunk)
+            text = _chunk_text(chunk)
+            if text and parser.feed(text):
+                break  # Todos os segmentos chegaram
+        return parser, usage
+
+    @retry_on(RETRYABLE_ERRORS, label="Gemini", rate_limit_errors=RATE_LIMIT_ERRORS)
+    async def _stream_response_async(self, prompt: str, expected: List[str], on_item=None):
+        """Versão assíncrona de _stream_response"""
+        await get_limiter("gemini").acquire_async(estimate_tokens(prompt))
+
+        target = self._target(prompt, create=False)
+        if target is None:
+            # Criar o cache de contexto é uma chamada síncrona (uma vez por validade)
+            target = await asyncio.to_thread(self._target, prompt)
+        model, content = target
+        parser = StreamingTranslationParser(expected, on_item)
+        usage = None
+        async for chunk in await model.generate_content_async(content, stream=True):
+            usage = getattr(chunk, 'usage_metadata', None) or usage
+            parser.truncated = parser.truncated or _hit_token_limit(chunk)
+            text = _chunk_text(chunk)
+            if text and parser.feed(text):
+                break
+        return parser, usage
 
-    def _parse_response(self, response_text: str) -> Optional[Dict[str, str]]:
+    def _target(self, prompt: str, create: bool = True):
         """
-        Parseia resposta JSON do modelo
+        Modelo e conteúdo a enviar para o prompt
+
+        Com o prefixo no cache de contexto do Gemini, só a parte da seção é
+        enviada; os tokens do prefixo são cobrados com desconto e não passam
+        de novo pelo prefill. Sem cache (desativado, prefixo abaixo do mínimo
+        ou recusado), vai o prompt completo para o modelo normal.
 
         Args:
-            response_text: Texto da resposta
+            prompt: Prompt completo
+            create: Se False, retorna None quando o cache ainda precisa ser criado
 
         Returns:
-            Dicionário {id: texto_traduzido} ou None se falhar
+            (modelo, conteúdo) ou None (ver `create`)
         """
-        try:
-            # Remover markdown code blocks se existirem
-            cleaned = response_text.strip()
-
-            # Remover ```json e ``` se presentes
-            if cleaned.startswith("```"):
-                # Encontrar primeiro { e último }
-                start = cleaned.find("{")
-                end = cleaned.rfind("}") + 1
-                if start != -1 and end > start:
-                    cleaned = cleaned[start:end]
-
-            # Parsear JSON
-            data = json.loads(cleaned)
-
-            # Extrair traduções
-            translations = {}
-            if "translations" in data:
-                for item in data["translations"]:
-                    if "id" in item and "translated" in item:
-                        translations[item["id"]] = item["translated"]
-
-            return translations if translations else None
-
-        except json.JSONDecodeError as e:
-            print(f"[ERRO] Falha ao parsear JSON: {str(e)}")
-            print(f"[DEBUG] Resposta recebida: {response_text[:500]}...")
-            return None
-        except Exception as e:
-            print(f"[ERRO] Erro ao processar resposta: {str(e)}")
+        prefix = self._prompt_prefix
+        if not self._prefix_cacheable or not prompt.startswith(prefix):
+            return self.model, prompt
+
+        key = (self.model_name, self.glossary_hash(), self.structured_output)
+        entry = _prefix_models.get(key, False)
+        if entry is False or (entry is not None and entry[1] <= time.monotonic()):
+            if not create:
+                return None
+            entry = self._create_prefix_model(key)
+
+        if entry is None:
+            return self.model, prompt
+        return entry[0], prompt[len(prefix):]
+
+    def _create_prefix_model(self, key: Tuple[str, str, bool]):
+        """Cria (ou renova) o cache de contexto do prefixo, uma vez por chave"""
+        with _prefix_lock:
+            entry = _prefix_models.get(key, False)
+            if entry is None or (entry is not False and entry[1] > time.monotonic()):
+                return entry  # Outra thread já resolveu
+
+            try:
+                cache = genai.caching.CachedContent.create(
+                    model=self.model_name,
+                    display_name=f"latin-grammar-prefix-{key[1]}",
+                    contents=[self._prompt_prefix],
+                    ttl=datetime.timedelta(seconds=GEMINI_PREFIX_CACHE_TTL)
+                )
+                model = genai.GenerativeModel.from_cached_content(
+                    cache,
+                    generation_config=self.generation_config,
+                    safety_settings=self.safety_settings
+                )
+                entry = (model, time.monotonic() + GEMINI_PREFIX_CACHE_TTL - _PREFIX_CACHE_MARGIN)
+                logger.info("[Gemini] Prefixo no cache de contexto: %s", cache.name)
+            except Exception as e:
+                logger.info("[Gemini] Cache de contexto indisponível, enviando prompt completo: %s", e)
+                entry = None
+
+            _prefix_models[key] = entry
+            return entry
+
+    def _tokens_used(self, usage) -> Optional[int]:
+        """Tokens da chamada (usage_metadata do último chunk recebido)"""
+        if usage is None:
             return None
+        tokens_used = usage.prompt_token_count + usage.candidates_token_count
+        logger.debug("[Gemini] Tokens usados: %d", tokens_used)
+        cached_tokens = getattr(usage, "cached_content_token_count", 0)
+        if cached_tokens:
+            logger.debug("[Gemini] Prefixo lido do cache de contexto: %d tokens", cached_tokens)
+        return tokens_used
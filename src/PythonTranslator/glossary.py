@@ -2,6 +2,10 @@
 Glossário de termos técnicos de gramática latina
 Inglês → Português Brasileiro
 """
+import functools
+import sys
+from itertools import islice
+from types import MappingProxyType
 
 # Glossário completo de termos gramaticais
 GRAMMAR_GLOSSARY = {
@@ -161,10 +165,66 @@ GRAMMAR_GLOSSARY = {
     "Alphabet": "Alfabeto",
 }
 
+# Uma única instância por termo, compartilhada com as traduções internadas
+GRAMMAR_GLOSSARY = {sys.intern(k): sys.intern(v) for k, v in GRAMMAR_GLOSSARY.items()}
 
-def get_glossary() -> dict:
-    """Retorna o glossário completo"""
-    return GRAMMAR_GLOSSARY.copy()
+
+# Visão somente leitura do glossário padrão (sem cópia por chamada)
+_GLOSSARY_VIEW = MappingProxyType(GRAMMAR_GLOSSARY)
+
+
+def _format_items(items) -> str:
+    """Formata pares (inglês, português) como linhas do prompt"""
+    return "\n".join(f"  • {en} → {pt}" for en, pt in items)
+
+
+# O glossário padrão é estático: o texto do prompt é montado uma única vez
+_FORMATTED_GLOSSARY_FULL = _format_items(GRAMMAR_GLOSSARY.items())
+
+
+def _build_casefold_index(items) -> dict:
+    """Índice termo.casefold() -> tradução (mantém a primeira ocorrência)"""
+    index = {}
+    for key, value in items:
+        index.setdefault(key.casefold(), value)
+    return index
+
+
+# Índice case-insensitive do glossário padrão (busca O(1))
+_GLOSSARY_CI = _build_casefold_index(GRAMMAR_GLOSSARY.items())
+
+
+def build_glossary_index(glossary: dict = None) -> dict:
+    """
+    Índice case-insensitive (termo.casefold() -> tradução) do glossário
+
+    Monte uma vez ao carregar um glossário customizado e passe para
+    search_glossary; o do glossário padrão já vem pronto.
+
+    Args:
+        glossary: Glossário customizado (usa padrão se None)
+
+    Returns:
+        Dicionário para busca O(1)
+    """
+    if glossary is None or glossary is _GLOSSARY_VIEW or glossary is GRAMMAR_GLOSSARY:
+        return _GLOSSARY_CI
+    return _build_casefold_index(glossary.items())
+
+
+@functools.lru_cache(maxsize=16)
+def _formatted(max_terms: int) -> str:
+    """Glossário padrão formatado, limitado aos primeiros `max_terms` termos"""
+    return _format_items(islice(GRAMMAR_GLOSSARY.items(), max_terms))
+
+
+def get_glossary() -> MappingProxyType:
+    """
+    Retorna o glossário completo (somente leitura)
+
+    Use dict(get_glossary()) para obter uma cópia mutável.
+    """
+    return _GLOSSARY_VIEW
 
 
 def format_glossary_for_prompt(glossary: dict = None, max_terms: int = None) -> str:
@@ -178,39 +238,38 @@ def format_glossary_for_prompt(glossary: dict = None, max_terms: int = None) ->
     Returns:
         String formatada para prompt
     """
-    if glossary is None:
-        glossary = GRAMMAR_GLOSSARY
+    if glossary is None or glossary is _GLOSSARY_VIEW or glossary is GRAMMAR_GLOSSARY:
+        return _formatted(max_terms) if max_terms else _FORMATTED_GLOSSARY_FULL
 
-    items = list(glossary.items())
+    items = glossary.items()
     if max_terms:
-        items = items[:max_terms]
+        items = islice(items, max_terms)
 
-    formatted = "\n".join([f"  • {en} → {pt}" for en, pt in items])
-    return formatted
+    return _format_items(items)
 
 
-def search_glossary(term: str, glossary: dict = None) -> str:
+def search_glossary(term: str, glossary: dict = None, index: dict = None) -> str:
     """
     Busca termo no glossário (case-insensitive)
 
     Args:
         term: Termo em inglês
         glossary: Glossário customizado
+        index: Índice de build_glossary_index(glossary); sem ele, o índice
+            de um glossário customizado é montado nesta chamada
 
     Returns:
         Tradução em português ou termo original se não encontrado
     """
-    if glossary is None:
+    if glossary is None or glossary is _GLOSSARY_VIEW or glossary is GRAMMAR_GLOSSARY:
         glossary = GRAMMAR_GLOSSARY
+        index = _GLOSSARY_CI
 
     # Busca exata
     if term in glossary:
         return glossary[term]
 
-    # Busca case-insensitive
-    term_lower = term.lower()
-    for key, value in glossary.items():
-        if key.lower() == term_lower:
-            return value
-
-    return term  # Não encontrado, retorna original
+    # Busca case-insensitive (retorna original se não encontrado)
+    if index is None:
+        index = build_glossary_index(glossary)
+    return index.get(term.casefold(), term)
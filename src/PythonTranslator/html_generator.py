@@ -3,8 +3,102 @@ Gerador de HTML a partir de ParsedDocument traduzido
 Reconstrói HTML completo mantendo formatação e estrutura
 """
 from models import ParsedDocument, ParsedNode, TextSegment, NodeType, TextType, FormattingStyle
-from typing import Optional, List
-import html
+from functools import lru_cache
+from typing import Iterable, Optional, List, TextIO, Tuple
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+
+# Mesmas substituições de html.escape(quote=True)
+_ESCAPES = {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#x27;'}
+_ESCAPE_RE = re.compile(r'[&<>"\']')
+_ESCAPE_TABLE = str.maketrans(_ESCAPES)
+
+
+_SELF_CLOSING_TAGS = frozenset(('br', 'hr', 'img'))
+
+# Espaço entre segmentos: não após espaço em branco nem antes de pontuação
+_ENDSPACE = frozenset(' \n\t')
+_NOSPACE = frozenset(' \n\t.,:;!?)]}')
+
+
+def _fast_escape(text: str) -> str:
+    """
+    Escapa texto para HTML em uma única passada
+
+    A maioria dos segmentos não tem nada a escapar; nesse caso a string
+    original é devolvida sem alocar uma nova. Quando há o que escapar,
+    str.translate substitui tudo em um laço em C (mais rápido que re.sub
+    com callback).
+    """
+    if _ESCAPE_RE.search(text) is None:
+        return text
+    return text.translate(_ESCAPE_TABLE)
+
+
+def _escape_identifier(text: str) -> str:
+    """
+    Escapa IDs de nós
+
+    Identificadores ASCII (o caso comum) não contêm caracteres especiais
+    e são devolvidos sem passar pela regex.
+    """
+    if text.isascii() and text.isidentifier():
+        return text
+    return _fast_escape(text)
+
+
+def _attribute_list(
+    node_id: Optional[str],
+    attributes: Iterable[Tuple[str, str]],
+    inline_style: Optional[str]
+) -> List[str]:
+    """Lista de atributos HTML (key="valor" escapado) na ordem de saída"""
+    attrs = []
+
+    # ID
+    if node_id:
+        attrs.append(f'id="{_escape_identifier(node_id)}"')
+
+    # Atributos preservados
+    has_style = False
+    for key, value in attributes:
+        if key == 'style':
+            has_style = True
+        attrs.append(f'{key}="{_fast_escape(str(value))}"')
+
+    # Style inline (se já não estiver nos atributos)
+    if inline_style and not has_style:
+        attrs.append(f'style="{_fast_escape(inline_style)}"')
+
+    return attrs
+
+
+@lru_cache(maxsize=2048)
+def _open_tag(
+    tag: str,
+    node_id: Optional[str],
+    attributes: Tuple[Tuple[str, str], ...],
+    inline_style: Optional[str]
+) -> str:
+    """
+    Tag de abertura completa (sem indentação)
+
+    Args:
+        tag: Nome da tag
+        node_id: ID do nó
+        attributes: Atributos preservados, como tupla de pares
+        inline_style: Style inline do nó
+
+    Returns:
+        "<tag attrs>" ou "<tag attrs />" para tags auto-fecháveis
+    """
+    parts = [tag]
+    parts.extend(_attribute_list(node_id, attributes, inline_style))
+    end = ' />' if tag in _SELF_CLOSING_TAGS else '>'
+    return '<' + ' '.join(parts) + end
 
 
 class HtmlGenerator:
@@ -14,6 +108,10 @@ class HtmlGenerator:
         self.css_file = css_file
         self.indent_level = 0
         self.indent_size = 2
+        # Indentação pré-calculada por nível (cresce sob demanda se passar disso)
+        self._indents: List[str] = [' ' * (i * self.indent_size) for i in range(32)]
+        # Buffer reutilizado por write_top_level_node (esvaziado a cada nó)
+        self._out: List[str] = []
 
     def generate_html(self, parsed_doc: ParsedDocument, output_path: str):
         """
@@ -23,31 +121,51 @@ class HtmlGenerator:
             parsed_doc: Documento parseado e traduzido
             output_path: Caminho para salvar arquivo .html
         """
-        print(f"\n{'='*80}")
-        print(f"GERANDO HTML TRADUZIDO")
-        print(f"{'='*80}\n")
+        # Salvar arquivo (escrito em fluxo, sem montar o documento inteiro na memória)
+        with open(output_path, 'w', encoding='utf-8') as f:
+            self._write_complete_html(parsed_doc, f)
 
-        html_content = self._build_complete_html(parsed_doc)
+        logger.info(
+            "[OK] HTML salvo: %s | título: %s | nodes: %d | encoding: %s",
+            output_path, parsed_doc.title, parsed_doc.stats.get('total_nodes', 0), parsed_doc.encoding
+        )
 
-        # Salvar arquivo
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+    def _write_complete_html(self, parsed_doc: ParsedDocument, fp: TextIO):
+        """
+        Escreve o documento HTML completo em `fp`
 
-        print(f"[OK] HTML salvo: {output_path}")
-        print(f"  - Título: {parsed_doc.title}")
-        print(f"  - Total de nodes: {parsed_doc.stats.get('total_nodes', 0)}")
-        print(f"  - Encoding: {parsed_doc.encoding}\n")
+        Cada node de nível superior é montado em um buffer pequeno e escrito
+        logo em seguida, então o pico de memória não cresce com o documento.
 
-    def _build_complete_html(self, parsed_doc: ParsedDocument) -> str:
-        """Constrói documento HTML completo"""
+        Args:
+            parsed_doc: Documento parseado e traduzido
+            fp: Arquivo (ou buffer) de texto aberto para escrita
+        """
+        self.write_header(parsed_doc.title, fp)
+
+        # Processar todos os nodes do documento
+        for node in parsed_doc.nodes:
+            self.write_top_level_node(node, fp)
+
+        self.write_footer(fp)
+
+    def write_header(self, title: str, fp: TextIO):
+        """
+        Escreve o cabeçalho HTML até a abertura do page-wrapper
 
-        # Cabeçalho HTML
+        Com write_top_level_node e write_footer, permite gerar o documento
+        nó a nó (ex: StreamingPipeline) sem ter o ParsedDocument inteiro.
+
+        Args:
+            title: Título do documento
+            fp: Arquivo de texto aberto para escrita
+        """
         html_parts = [
             '<!DOCTYPE html>',
             '<html>',
             '',
             '<head>',
-            f'  <title>{html.escape(parsed_doc.title)}</title>',
+            f'  <title>{_fast_escape(title)}</title>',
             '  <meta http-equiv="Content-Type" content="text/html; charset=utf-8" />',
             f'  <link rel="stylesheet" href="{self.css_file}" />',
             '</head>',
@@ -55,92 +173,92 @@ class HtmlGenerator:
             '<body class="simple">',
             '  <div id="page-wrapper">',
         ]
+        fp.write('\n'.join(html_parts))
+        self.indent_level = 2  # Nodes começam dentro de page-wrapper
 
-        # Processar todos os nodes do documento
-        self.indent_level = 2  # Começa dentro de page-wrapper
-        for node in parsed_doc.nodes:
-            html_parts.append(self._node_to_html(node))
-
-        # Rodapé HTML
-        html_parts.extend([
-            '  </div>',
-            '</body>',
-            '',
-            '</html>'
-        ])
-
-        return '\n'.join(html_parts)
-
-    def _node_to_html(self, node: ParsedNode) -> str:
+    def write_top_level_node(self, node: ParsedNode, fp: TextIO):
         """
-        Converte um ParsedNode em HTML
+        Escreve um node de nível superior em `fp` (depois de write_header)
 
         Args:
-            node: Nó a converter
-
-        Returns:
-            String HTML do nó
+            node: Node a escrever
+            fp: Arquivo de saída
         """
-        indent = ' ' * (self.indent_level * self.indent_size)
-
-        # Mapear NodeType para tag HTML
-        tag = self._get_html_tag(node.node_type)
+        out = self._out
+        out.append('\n')
+        self._write_node(node, out, self.indent_level)
+        fp.writelines(out)
+        out.clear()
 
-        # Construir atributos
-        attributes = self._build_attributes(node)
-        attr_str = ' ' + ' '.join(attributes) if attributes else ''
+    def write_footer(self, fp: TextIO):
+        """Fecha page-wrapper, body e html"""
+        fp.write('\n  </div>\n</body>\n\n</html>')
 
-        # Caso especial para tags auto-fecháveis (se houver)
-        if tag in ['br', 'hr', 'img']:
-            return f"{indent}<{tag}{attr_str} />"
-
-        # Construir conteúdo interno
-        content_parts = []
+    def _write_node(self, root: ParsedNode, out: List[str], root_level: int):
+        """
+        Escreve o HTML do nó e de seus descendentes em `out`
 
-        # Adicionar segmentos de texto
-        if node.text_segments:
-            content_parts.append(self._build_text_content(node.text_segments))
+        Percurso em pré-ordem com pilha explícita (sem recursão): documentos
+        profundos não estouram o limite de recursão e não há concatenação
+        de strings intermediárias por nível.
 
-        # Processar children recursivamente
-        if node.children:
-            self.indent_level += 1
-            for child in node.children:
-                content_parts.append('\n' + self._node_to_html(child))
-            self.indent_level -= 1
+        Args:
+            root: Nó a converter
+            out: Lista onde os pedaços de HTML são acumulados
+            root_level: Nível de indentação do nó
+        """
+        # Pilha de (nó, nível, fechando)
+        stack = [(root, root_level, False)]
 
-            # Se tem children, fechar tag em linha separada
-            if node.children:
-                return f"{indent}<{tag}{attr_str}>{''.join(content_parts)}\n{indent}</{tag}>"
+        while stack:
+            node, level, closing = stack.pop()
+            indent = self._indent(level)
 
-        # Tag simples com conteúdo inline
-        content = ''.join(content_parts)
-        return f"{indent}<{tag}{attr_str}>{content}</{tag}>"
+            # NodeType já contém o valor da tag (h1, p, etc)
+            tag = node.node_type.value
 
-    def _get_html_tag(self, node_type: NodeType) -> str:
-        """Mapeia NodeType para tag HTML"""
-        # NodeType já contém o valor da tag (h1, p, etc)
-        return node_type.value
+            # Nó com children: fechar tag em linha separada
+            if closing:
+                out.extend(('\n', indent, '</', tag, '>'))
+                continue
 
-    def _build_attributes(self, node: ParsedNode) -> List[str]:
-        """Constrói lista de atributos HTML para o nó"""
-        attrs = []
+            # Children ficam em linhas próprias
+            if level != root_level:
+                out.append('\n')
 
-        # ID
-        if node.node_id:
-            attrs.append(f'id="{html.escape(node.node_id)}"')
+            # Tag de abertura com atributos (memoizada: células de tabela
+            # repetem os mesmos atributos milhares de vezes)
+            out.append(indent)
+            out.append(_open_tag(
+                tag, node.node_id, tuple(node.attributes.items()), node.inline_style
+            ))
 
-        # Atributos preservados
-        for key, value in node.attributes.items():
-            escaped_value = html.escape(str(value))
-            attrs.append(f'{key}="{escaped_value}"')
+            # Tags auto-fecháveis não têm conteúdo nem fechamento
+            if tag in _SELF_CLOSING_TAGS:
+                continue
 
-        # Style inline
-        if node.inline_style:
-            # Verificar se já não está nos attributes
-            if 'style' not in node.attributes:
-                attrs.append(f'style="{html.escape(node.inline_style)}"')
+            # Adicionar segmentos de texto
+            if node.text_segments:
+                out.append(self._build_text_content(node.text_segments))
 
-        return attrs
+            if node.children:
+                stack.append((node, level, True))
+                # Ordem inversa: o primeiro filho sai primeiro da pilha
+                for child in reversed(node.children):
+                    stack.append((child, level + 1, False))
+            else:
+                # Tag simples com conteúdo inline
+                out.extend(('</', tag, '>'))
+
+    def _indent(self, level: int) -> str:
+        """Indentação do nível (calculada uma vez por nível)"""
+        try:
+            return self._indents[level]
+        except IndexError:
+            indents = self._indents
+            while len(indents) <= level:
+                indents.append(' ' * (len(indents) * self.indent_size))
+            return indents[level]
 
     def _build_text_content(self, segments: List[TextSegment]) -> str:
         """
@@ -152,23 +270,22 @@ class HtmlGenerator:
         Returns:
             String HTML com texto formatado
         """
-        html_parts = []
+        return ''.join(self._iter_text_content(segments))
 
-        for i, segment in enumerate(segments):
-            text_html = self._segment_to_html(segment)
-            html_parts.append(text_html)
+    def _iter_text_content(self, segments: List[TextSegment]):
+        """Gera o HTML de cada segmento e os espaços entre eles"""
+        for segment, next_segment in zip(segments, segments[1:]):
+            yield self._segment_to_html(segment)
 
-            # Adicionar espaço entre segmentos, exceto:
-            # - Após o último segmento
-            # - Se o próximo segmento começa com pontuação
-            if i < len(segments) - 1:
-                next_segment = segments[i + 1]
-                # Não adicionar espaço antes de pontuação ou se o texto atual termina com espaço
-                if (not segment.text.endswith((' ', '\n', '\t')) and
-                    not next_segment.text.startswith((' ', '\n', '\t', '.', ',', ':', ';', '!', '?', ')', ']', '}'))):
-                    html_parts.append(' ')
+            # Não adicionar espaço antes de pontuação ou se o texto atual termina com espaço
+            text, next_text = segment.text, next_segment.text
+            if ((not text or text[-1] not in _ENDSPACE) and
+                    (not next_text or next_text[0] not in _NOSPACE)):
+                yield ' '
 
-        return ''.join(html_parts)
+        # Último segmento: nunca seguido de espaço
+        if segments:
+            yield self._segment_to_html(segments[-1])
 
     def _segment_to_html(self, segment: TextSegment) -> str:
         """
@@ -180,7 +297,7 @@ class HtmlGenerator:
         Returns:
             String HTML do segmento
         """
-        text = html.escape(segment.text)
+        text = _fast_escape(segment.text)
 
         # Construir wrapper com classe CSS se necessário
         needs_wrapper = False
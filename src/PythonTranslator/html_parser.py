@@ -1,15 +1,118 @@
 """
 Parser HTML robusto para documentos da gramática latina Allen & Greenough
 """
-from bs4 import BeautifulSoup, Tag, NavigableString, Comment
-from typing import List, Optional, Dict, Tuple
+from lxml import etree
+import functools
+import os
+import pickle
+import sys
+import threading
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 import re
 from models import (
     ParsedDocument, ParsedNode, TextSegment, FormattingStyle,
-    NodeType, TextType, TableStructure
+    NodeType, TextType, TableStructure, EMPTY_FORMATTING
 )
 
 
+# Atributos com vários valores separados por espaço (normalizados como no BeautifulSoup)
+_MULTI_VALUED_ATTRIBUTES = {'class', 'rel', 'rev', 'headers', 'accesskey', 'accept-charset'}
+
+
+# Padrões usados por elemento (compilados uma vez)
+_RE_PADDING = re.compile(r'padding-left:\s*(\d+px)')
+_RE_ALIGN = re.compile(r'text-align:\s*(\w+)')
+_RE_SECTION = re.compile(r'^(\d+[a-z]?)\.?$')
+_RE_CHARSET = re.compile(r'charset=([\w-]+)')
+
+_ASCII_SPACES = '\x20\x0a\x09\x0c\x0d'
+
+# Valores de atributo menores que isso são internados (ver _attributes)
+_INTERN_MAX_LEN = 32
+
+# Arquivos parseados mantidos em memória por parse_html_cached
+PARSED_CACHE_SIZE = 64
+
+# Células de tabela por tag (filtradas pelo iterchildren do lxml, em C)
+_CELL_TYPES = {'td': NodeType.TABLE_CELL, 'th': NodeType.TABLE_HEADER}
+
+# Tag HTML -> NodeType (tags fora do mapa não viram nós)
+_TAG_TO_NODETYPE = {
+    'h1': NodeType.HEADING_1,
+    'h2': NodeType.HEADING_2,
+    'h3': NodeType.HEADING_3,
+    'h4': NodeType.HEADING_4,
+    'p': NodeType.PARAGRAPH,
+    'ol': NodeType.LIST_ORDERED,
+    'ul': NodeType.LIST_UNORDERED,
+    'li': NodeType.LIST_ITEM,
+    'table': NodeType.TABLE,
+    'tr': NodeType.TABLE_ROW,
+    'td': NodeType.TABLE_CELL,
+    'th': NodeType.TABLE_HEADER,
+    'blockquote': NodeType.BLOCKQUOTE,
+    'div': NodeType.DIV,
+    'span': NodeType.SPAN,
+    'a': NodeType.LINK,
+    'strong': NodeType.STRONG,
+    'em': NodeType.EMPHASIS,
+}
+
+# Tags que implicam formatação (negrito, itálico, sublinhado)
+_FORMATTING_TAGS = frozenset(('strong', 'b', 'em', 'i', 'u'))
+
+
+def _text_content(element: etree._Element) -> str:
+    """
+    Texto do elemento e descendentes (sem comentários e sem o tail do próprio elemento)
+
+    Trechos só com espaços viram um único "\n" (ou " "), como no BeautifulSoup.
+    """
+    # Folha (caso mais comum): o texto é só element.text, sem percorrer a subárvore
+    if not len(element):
+        return _collapse_blank(element.text or '')
+    return ''.join([_collapse_blank(text) for text in element.itertext()])
+
+
+def _collapse_blank(text: str) -> str:
+    """Trecho só com espaços vira "\n" (se tiver quebra de linha) ou " " """
+    if text and not text.strip(_ASCII_SPACES):
+        return '\n' if '\n' in text else ' '
+    return text
+
+
+def _classes(element: etree._Element) -> List[str]:
+    """Lista de classes CSS do elemento"""
+    return (element.get('class') or '').split()
+
+
+def _classes_of(element: etree._Element, attribute: str) -> List[str]:
+    """Valores de um atributo com vários valores (ex: rel="stylesheet alternate")"""
+    return (element.get(attribute) or '').split()
+
+
+def _attributes(element: etree._Element) -> Dict[str, str]:
+    """
+    Atributos do elemento com valores múltiplos normalizados (ex: class)
+
+    Nomes de atributo e valores curtos (classes, alinhamentos) se repetem em
+    milhares de nós; são internados para que todos compartilhem o mesmo objeto.
+    IDs são únicos por nó e ficam de fora.
+    """
+    attrib = element.attrib
+    if not attrib:
+        return {}
+    attributes = {}
+    multi_valued = _MULTI_VALUED_ATTRIBUTES
+    for key, value in attrib.items():
+        if key in multi_valued:
+            value = ' '.join(value.split())
+        if key != 'id' and len(value) < _INTERN_MAX_LEN:
+            value = sys.intern(value)
+        attributes[sys.intern(key)] = value
+    return attributes
+
+
 class LatinGrammarParser:
     """Parser especializado para arquivos HTML da gramática latina"""
 
@@ -25,7 +128,41 @@ class LatinGrammarParser:
     # Tags que preservam formatação inline
     INLINE_TAGS = {'span', 'strong', 'em', 'b', 'i', 'u', 'a', 'sup', 'sub'}
 
+    # Opções do parser lxml (libxml2); subclasses/testes podem sobrescrever.
+    # Sem 'encoding': em bytes o libxml2 detecta pelo <meta charset>
+    PARSER = {'remove_blank_text': False}
+
     def __init__(self):
+        self.reset_stats()
+        # Parsers lxml não podem ser usados por duas threads ao mesmo tempo:
+        # um por thread, criado na primeira chamada e reaproveitado depois
+        self._local = threading.local()
+        # Metadados do último documento lido por iter_stream
+        self.metadata = {"title": "Untitled", "encoding": "utf-8", "css_file": None}
+
+    def _parser_options(self, encoding: Optional[str] = None) -> Dict:
+        """Opções de PARSER, com o encoding forçado se informado"""
+        if encoding is None:
+            return self.PARSER
+        return {**self.PARSER, 'encoding': encoding}
+
+    def _html_parser(self, encoding: Optional[str] = None) -> etree.HTMLParser:
+        """
+        etree.HTMLParser desta thread, configurado por PARSER
+
+        Args:
+            encoding: Encoding forçado (None deixa o libxml2 detectar)
+        """
+        parsers = getattr(self._local, 'parsers', None)
+        if parsers is None:
+            parsers = self._local.parsers = {}
+        html_parser = parsers.get(encoding)
+        if html_parser is None:
+            html_parser = parsers[encoding] = etree.HTMLParser(**self._parser_options(encoding))
+        return html_parser
+
+    def reset_stats(self):
+        """Zera as estatísticas (chamado no início de cada documento)"""
         self.stats = {
             "total_nodes": 0,
             "text_segments": 0,
@@ -36,103 +173,229 @@ class LatinGrammarParser:
             "lists": 0
         }
 
-    def parse_html(self, html_content: str, filename: Optional[str] = None) -> ParsedDocument:
+    def parse_html(self, html_content: Union[str, bytes], filename: Optional[str] = None) -> ParsedDocument:
         """
         Parseia conteúdo HTML e retorna documento estruturado
 
         Args:
-            html_content: String com conteúdo HTML
+            html_content: Conteúdo HTML; bytes (ex: Path.read_bytes()) vão
+                direto para o lxml, que detecta o encoding pelo <meta charset>
             filename: Nome do arquivo original (opcional)
 
         Returns:
             ParsedDocument com estrutura completa
         """
-        soup = BeautifulSoup(html_content, 'lxml')
+        input_encoding = None
+        if isinstance(html_content, str):
+            # Texto já decodificado: vai como UTF-8, ignorando o <meta charset>
+            html_content = html_content.encode('utf-8')
+            input_encoding = 'utf-8'
+
+        # lxml direto (C), sem a árvore de objetos Python do BeautifulSoup
+        root = etree.fromstring(html_content, parser=self._html_parser(input_encoding))
 
         # Extrair metadados
-        title = self._extract_title(soup)
-        encoding = self._extract_encoding(soup)
-        css_file = self._extract_css_link(soup)
+        title = self._extract_title(root)
+        encoding = self._extract_encoding(root)
+        css_file = self._extract_css_link(root)
 
         # Resetar estatísticas
-        self.stats = {
-            "total_nodes": 0,
-            "text_segments": 0,
-            "latin_segments": 0,
-            "english_segments": 0,
-            "gloss_segments": 0,
-            "tables": 0,
-            "lists": 0
-        }
+        self.reset_stats()
 
         # Parsear corpo do documento
-        body = soup.find('body')
-        if not body:
-            body = soup  # Fallback se não houver tag body
+        body = root.find('body') if root is not None else None
+        if body is None:
+            # Fallback se não houver tag body (documento vazio não tem nós)
+            body = [root] if root is not None else []
+
+        # Processar nós principais (ignorando comentários HTML)
+        nodes = (
+            self._parse_element(child) for child in body
+            if isinstance(child.tag, str)
+        )
+        return self._build_document(nodes, title, encoding, css_file, filename)
 
-        # Processar nós principais
-        nodes = []
-        sections = {}
-        footnotes = {}
+    def parse_stream(
+        self,
+        source: Union[str, BinaryIO],
+        filename: Optional[str] = None,
+        encoding: Optional[str] = None
+    ) -> ParsedDocument:
+        """
+        Parseia HTML em fluxo (lxml iterparse) sem carregar o arquivo inteiro
+
+        Produz o mesmo ParsedDocument que parse_html, mas cada bloco de
+        nível superior do <body> é descartado da árvore lxml assim que vira
+        ParsedNode, então só o documento parseado fica em memória.
+
+        Args:
+            source: Caminho ou arquivo binário aberto ('rb') com o HTML
+            filename: Nome do arquivo original (opcional)
+            encoding: Encoding do HTML de entrada (None detecta pelo <meta charset>)
 
-        for child in body.children:
-            # Ignorar comentários HTML
-            if isinstance(child, Comment):
-                continue
+        Returns:
+            ParsedDocument com estrutura completa
+        """
+        nodes = list(self.iter_stream(source, encoding))
+        metadata = self.metadata
+        return self._build_document(
+            nodes, metadata["title"], metadata["encoding"], metadata["css_file"], filename
+        )
+
+    def parse_html_cached(self, path: str) -> ParsedDocument:
+        """
+        Parseia um arquivo reaproveitando o resultado dentro do processo
+
+        O resultado fica num lru_cache indexado pela classe do parser,
+        caminho, mtime e tamanho: enquanto o arquivo não mudar, as próximas
+        chamadas não parseiam de novo. Cada chamada recebe uma cópia própria (a tradução altera o
+        documento no lugar).
+
+        Args:
+            path: Caminho do arquivo HTML
+
+        Returns:
+            ParsedDocument com estrutura completa
+        """
+        stat = os.stat(path)
+        snapshot = _parsed_snapshot(type(self), os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+        parsed_doc = pickle.loads(snapshot)
+        self.stats = parsed_doc.stats
+        return parsed_doc
+
+    def iter_stream(
+        self,
+        source: Union[str, BinaryIO],
+        encoding: Optional[str] = None
+    ) -> Iterator[ParsedNode]:
+        """
+        Parseia HTML em fluxo, produzindo cada nó de nível superior do <body>
+
+        Metadados (title, encoding, css_file) são lidos dos eventos e ficam em
+        `self.metadata`; os do <head> já estão disponíveis no primeiro nó.
+
+        Args:
+            source: Caminho ou arquivo binário aberto ('rb') com o HTML
+            encoding: Encoding do HTML de entrada (None detecta pelo <meta charset>)
+
+        Yields:
+            ParsedNode de cada elemento de nível superior
+        """
+        self.reset_stats()
+        metadata = self.metadata = {"title": "Untitled", "encoding": "utf-8", "css_file": None}
+        title_found = charset_found = css_found = False
+        depth = 0
+
+        events = etree.iterparse(
+            source, events=('start', 'end'), html=True, **self._parser_options(encoding)
+        )
+        try:
+            for event, element in events:
+                if event == 'start':
+                    depth += 1
+                    continue
+                depth -= 1
+
+                tag = element.tag
+                # Mesmos critérios de _extract_title/_extract_encoding/_extract_css_link
+                if tag == 'title':
+                    if not title_found:
+                        metadata["title"] = _text_content(element).strip()
+                        title_found = True
+                elif tag == 'meta':
+                    if not charset_found and element.get('http-equiv') == 'Content-Type':
+                        content = element.get('content')
+                        match = _RE_CHARSET.search(content) if content is not None else None
+                        if match:
+                            metadata["encoding"] = match.group(1)
+                        charset_found = True
+                elif tag == 'link':
+                    if not css_found and 'stylesheet' in _classes_of(element, 'rel'):
+                        metadata["css_file"] = element.get('href')
+                        css_found = True
+
+                # html (0) > body (1) > elemento de nível superior (2)
+                if depth != 2 or not isinstance(tag, str):
+                    continue
+                parent = element.getparent()
+                if parent.tag != 'body':
+                    continue
+
+                parsed = self._parse_element(element)
+
+                # Bloco já convertido: liberar elemento e irmãos anteriores
+                element.clear()
+                while element.getprevious() is not None:
+                    del parent[0]
 
-            if isinstance(child, Tag):
-                parsed = self._parse_element(child)
                 if parsed:
-                    nodes.append(parsed)
+                    yield parsed
+        except etree.XMLSyntaxError:
+            # Documento vazio não tem raiz (como em parse_html, não tem nós)
+            if events.root is not None:
+                raise
+
+    def _build_document(
+        self,
+        nodes: Iterable[Optional[ParsedNode]],
+        title: str,
+        encoding: str,
+        css_file: Optional[str],
+        filename: Optional[str]
+    ) -> ParsedDocument:
+        """Indexa seções/notas dos nós de nível superior e monta o ParsedDocument"""
+        parsed_nodes = []
+        sections = {}
+        footnotes = {}
 
-                    # Indexar por ID se existir
-                    if parsed.node_id:
-                        sections[parsed.node_id] = parsed
+        for parsed in nodes:
+            if parsed:
+                parsed_nodes.append(parsed)
 
-                    # Indexar footnotes
-                    if parsed.is_footnote and parsed.footnote_id:
-                        footnotes[parsed.footnote_id] = parsed
+                # Indexar por ID se existir
+                if parsed.node_id:
+                    sections[parsed.node_id] = parsed
 
-        return ParsedDocument(
+                # Indexar footnotes
+                if parsed.is_footnote and parsed.footnote_id:
+                    footnotes[parsed.footnote_id] = parsed
+
+        # Campos montados pelo próprio parser: sem revalidação do Pydantic.
+        # self.stats é recriado a cada documento, então pode ser entregue sem cópia
+        return ParsedDocument.model_construct(
             title=title,
             encoding=encoding,
-            nodes=nodes,
+            nodes=parsed_nodes,
             sections=sections,
             footnotes=footnotes,
-            stats=self.stats.copy(),
+            stats=self.stats,
             original_filename=filename,
             css_file=css_file
         )
 
-    def _parse_element(self, element: Tag) -> Optional[ParsedNode]:
+    def _parse_element(self, element: etree._Element) -> Optional[ParsedNode]:
         """
         Parseia um elemento HTML recursivamente
 
         Args:
-            element: Tag BeautifulSoup
+            element: Elemento lxml
 
         Returns:
             ParsedNode ou None se elemento deve ser ignorado
         """
-        tag_name = element.name.lower()
+        tag_name = element.tag.lower()
 
         # Ignorar tags de script, style, etc.
         if tag_name in {'script', 'style', 'meta', 'link', 'head'}:
             return None
 
         # Mapear tag para NodeType
-        node_type = self._get_node_type(tag_name)
+        node_type = _TAG_TO_NODETYPE.get(tag_name)
         if not node_type:
             return None
 
-        # Extrair atributos (converter listas em strings)
-        attributes = {}
-        for key, value in element.attrs.items():
-            if isinstance(value, list):
-                # Atributos como 'class' vêm como lista no BeautifulSoup
-                attributes[key] = ' '.join(value)
-            else:
-                attributes[key] = value
+        # Extrair atributos
+        attributes = _attributes(element)
 
         node_id = attributes.get('id')
         inline_style = attributes.get('style')
@@ -170,34 +433,25 @@ class LatinGrammarParser:
         self.stats["total_nodes"] += 1
         return node
 
-    def _parse_content(self, element: Tag, node: ParsedNode):
+    def _parse_content(self, element: etree._Element, node: ParsedNode):
         """
         Parseia conteúdo misto de um elemento (texto + tags inline + tags block)
 
+        No lxml o texto antes do primeiro filho fica em `element.text` e o
+        texto depois de cada filho em `child.tail`.
+
         Args:
-            element: Tag BeautifulSoup
+            element: Elemento lxml
             node: ParsedNode para preencher
         """
-        for child in element.children:
-            # Ignorar comentários HTML
-            if isinstance(child, Comment):
-                continue
-
-            if isinstance(child, NavigableString):
-                # Texto direto
-                text = str(child).strip()
-                if text:
-                    segment = self._create_text_segment(
-                        text=text,
-                        text_type=TextType.ENGLISH,  # Assume inglês por padrão
-                        element=element
-                    )
-                    node.text_segments.append(segment)
-                    self.stats["text_segments"] += 1
-                    self.stats["english_segments"] += 1
-
-            elif isinstance(child, Tag):
-                tag_name = child.name.lower()
+        # Formatação do elemento calculada uma vez para todo texto direto/tail
+        formatting = self._extract_formatting(element)
+        self._add_direct_text(element.text, formatting, node)
+
+        for child in element:
+            # Comentários HTML são ignorados, mas o texto depois deles não
+            if isinstance(child.tag, str):
+                tag_name = child.tag.lower()
 
                 if tag_name in self.INLINE_TAGS:
                     # Processar tag inline (span, strong, em, etc.)
@@ -208,7 +462,20 @@ class LatinGrammarParser:
                     if child_node:
                         node.children.append(child_node)
 
-    def _parse_inline_element(self, element: Tag, parent_node: ParsedNode):
+            self._add_direct_text(child.tail, formatting, node)
+
+    def _add_direct_text(self, text: Optional[str], formatting: FormattingStyle, node: ParsedNode):
+        """Adiciona texto direto do elemento (text/tail) como segmento em inglês"""
+        if not text:
+            return
+        text = text.strip()
+        if text:
+            # Assume inglês por padrão
+            node.text_segments.append(TextSegment(text, TextType.ENGLISH, formatting))
+            self.stats["text_segments"] += 1
+            self.stats["english_segments"] += 1
+
+    def _parse_inline_element(self, element: etree._Element, parent_node: ParsedNode):
         """
         Parseia elemento inline preservando formatação
 
@@ -223,25 +490,15 @@ class LatinGrammarParser:
         formatting = self._extract_formatting(element)
 
         # Processar conteúdo do elemento inline
-        text_content = []
-        for child in element.children:
-            # Ignorar comentários HTML
-            if isinstance(child, Comment):
-                continue
-
-            if isinstance(child, NavigableString):
-                text_content.append(str(child))
-            elif isinstance(child, Tag):
-                # Inline dentro de inline (ex: <span><strong>text</strong></span>)
-                text_content.append(child.get_text())
-
-        text = ''.join(text_content).strip()
+        # (inclui inline dentro de inline, ex: <span><strong>text</strong></span>)
+        text = _text_content(element).strip()
         if text:
+            classes = _classes(element)
             segment = TextSegment(
                 text=text,
                 text_type=text_type,
                 formatting=formatting,
-                html_class=element.get('class', [None])[0] if element.get('class') else None
+                html_class=sys.intern(classes[0]) if classes else None
             )
             parent_node.text_segments.append(segment)
 
@@ -254,7 +511,7 @@ class LatinGrammarParser:
             elif text_type == TextType.GLOSS:
                 self.stats["gloss_segments"] += 1
 
-    def _parse_table(self, table: Tag, node: ParsedNode):
+    def _parse_table(self, table: etree._Element, node: ParsedNode):
         """
         Parseia estrutura de tabela
 
@@ -262,17 +519,16 @@ class LatinGrammarParser:
             table: Tag <table>
             node: ParsedNode da tabela
         """
-        for row in table.find_all('tr', recursive=False):
+        for row in table.iterchildren('tr'):
             row_node = ParsedNode(
                 node_type=NodeType.TABLE_ROW,
-                attributes=dict(row.attrs)
+                attributes=_attributes(row)
             )
 
-            for cell in row.find_all(['td', 'th'], recursive=False):
-                cell_type = NodeType.TABLE_HEADER if cell.name == 'th' else NodeType.TABLE_CELL
+            for cell in row.iterchildren(*_CELL_TYPES):
                 cell_node = ParsedNode(
-                    node_type=cell_type,
-                    attributes=dict(cell.attrs),
+                    node_type=_CELL_TYPES[cell.tag],
+                    attributes=_attributes(cell),
                     inline_style=cell.get('style')
                 )
 
@@ -282,7 +538,7 @@ class LatinGrammarParser:
 
             node.children.append(row_node)
 
-    def _parse_list(self, list_element: Tag, node: ParsedNode):
+    def _parse_list(self, list_element: etree._Element, node: ParsedNode):
         """
         Parseia lista (ol/ul)
 
@@ -290,12 +546,12 @@ class LatinGrammarParser:
             list_element: Tag <ol> ou <ul>
             node: ParsedNode da lista
         """
-        for item in list_element.find_all('li', recursive=False):
+        for item in list_element.iterchildren('li'):
             item_node = self._parse_element(item)
             if item_node:
                 node.children.append(item_node)
 
-    def _determine_text_type(self, element: Tag) -> TextType:
+    def _determine_text_type(self, element: etree._Element) -> TextType:
         """
         Determina o tipo de texto baseado nas classes CSS
 
@@ -305,20 +561,23 @@ class LatinGrammarParser:
         Returns:
             TextType apropriado
         """
-        classes = element.get('class', [])
+        classes = _classes(element)
+        if not classes:
+            return TextType.ENGLISH
 
-        # Verificar classes conhecidas
-        if any(cls in self.LATIN_CLASSES for cls in classes):
+        # Verificar classes conhecidas (isdisjoint: uma chamada em C por conjunto;
+        # a ordem dos testes define a prioridade latim > gloss > referência)
+        if not self.LATIN_CLASSES.isdisjoint(classes):
             return TextType.LATIN
-        elif any(cls in self.GLOSS_CLASSES for cls in classes):
+        elif not self.GLOSS_CLASSES.isdisjoint(classes):
             return TextType.GLOSS
-        elif any(cls in self.REFERENCE_CLASSES for cls in classes):
+        elif not self.REFERENCE_CLASSES.isdisjoint(classes):
             return TextType.REFERENCE
 
         # Padrão: inglês
         return TextType.ENGLISH
 
-    def _extract_formatting(self, element: Tag) -> FormattingStyle:
+    def _extract_formatting(self, element: etree._Element) -> FormattingStyle:
         """
         Extrai estilo de formatação do elemento
 
@@ -328,64 +587,57 @@ class LatinGrammarParser:
         Returns:
             FormattingStyle com propriedades extraídas
         """
-        formatting = FormattingStyle()
+        # Caso comum (span/texto simples sem style): nada a extrair
+        style = element.get('style')
+        tag_name = element.tag  # lxml já normaliza tags HTML para minúsculas
+        if not style and tag_name not in _FORMATTING_TAGS:
+            return EMPTY_FORMATTING
+
+        bold = italic = underline = False
+        padding_left = text_align = None
 
         # Formatação por tag
-        tag_name = element.name.lower()
         if tag_name in {'strong', 'b'}:
-            formatting.bold = True
+            bold = True
         elif tag_name in {'em', 'i'}:
-            formatting.italic = True
+            italic = True
         elif tag_name == 'u':
-            formatting.underline = True
+            underline = True
 
         # Formatação por estilo inline
-        style = element.get('style', '')
-        if 'font-weight: bold' in style or 'font-weight:bold' in style:
-            formatting.bold = True
-        if 'font-style: italic' in style or 'font-style:italic' in style:
-            formatting.italic = True
-        if 'text-decoration: underline' in style:
-            formatting.underline = True
-
-        # Extrair padding-left
-        padding_match = re.search(r'padding-left:\s*(\d+px)', style)
-        if padding_match:
-            formatting.padding_left = padding_match.group(1)
-
-        # Extrair text-align
-        align_match = re.search(r'text-align:\s*(\w+)', style)
-        if align_match:
-            formatting.text_align = align_match.group(1)
-
-        return formatting
-
-    def _create_text_segment(
-        self,
-        text: str,
-        text_type: TextType,
-        element: Tag
-    ) -> TextSegment:
-        """
-        Cria um TextSegment com formatação do elemento pai
-
-        Args:
-            text: Texto do segmento
-            text_type: Tipo de texto
-            element: Elemento HTML pai
-
-        Returns:
-            TextSegment configurado
-        """
-        formatting = self._extract_formatting(element)
-
-        return TextSegment(
-            text=text,
-            text_type=text_type,
-            formatting=formatting
+        if style:
+            if 'font-weight: bold' in style or 'font-weight:bold' in style:
+                bold = True
+            if 'font-style: italic' in style or 'font-style:italic' in style:
+                italic = True
+            if 'text-decoration: underline' in style:
+                underline = True
+
+            # Extrair padding-left (substring antes do regex: a maioria não tem)
+            if 'padding-left' in style:
+                padding_match = _RE_PADDING.search(style)
+                if padding_match:
+                    padding_left = padding_match.group(1)
+
+            # Extrair text-align
+            if 'text-align' in style:
+                align_match = _RE_ALIGN.search(style)
+                if align_match:
+                    text_align = align_match.group(1)
+
+        # Sem formatação: reutilizar a instância compartilhada
+        if not (bold or italic or underline or padding_left or text_align):
+            return EMPTY_FORMATTING
+
+        return FormattingStyle(
+            bold=bold,
+            italic=italic,
+            underline=underline,
+            padding_left=padding_left,
+            text_align=text_align
         )
 
-    def _extract_section_number(self, element: Tag) -> Optional[str]:
+    def _extract_section_number(self, element: etree._Element) -> Optional[str]:
         """
         Extrai número de seção se presente (ex: "153", "154a")
 
@@ -396,17 +648,17 @@ class LatinGrammarParser:
             Número da seção ou None
         """
         # Procurar por <strong>número</strong> no início do parágrafo
-        strong = element.find('strong')
-        if strong:
-            text = strong.get_text().strip()
+        strong = element.find('.//strong')
+        if strong is not None:
+            text = _text_content(strong).strip()
             # Padrão: número opcionalmente seguido de letra
-            match = re.match(r'^(\d+[a-z]?)\.?$', text)
+            match = _RE_SECTION.match(text)
             if match:
                 return match.group(1)
 
         return None
 
-    def _check_footnote(self, element: Tag) -> Tuple[bool, Optional[str]]:
+    def _check_footnote(self, element: etree._Element) -> Tuple[bool, Optional[str]]:
         """
         Verifica se elemento é uma footnote
 
@@ -417,8 +669,8 @@ class LatinGrammarParser:
             (is_footnote, footnote_id)
         """
         # Procurar por links de footnote
-        link = element.find('a')
-        if link and link.get('id'):
+        link = element.find('.//a')
+        if link is not None and link.get('id'):
             link_id = link.get('id')
             # Padrão: fn1, fn2, rfn1, rfn2, etc.
             if link_id.startswith('fn') or link_id.startswith('rfn'):
@@ -426,54 +678,58 @@ class LatinGrammarParser:
 
         return False, None
 
-    def _get_node_type(self, tag_name: str) -> Optional[NodeType]:
+    def _metadata_scopes(self, root: Optional[etree._Element]) -> List[etree._Element]:
         """
-        Mapeia tag HTML para NodeType
-
-        Args:
-            tag_name: Nome da tag
-
-        Returns:
-            NodeType correspondente ou None
+        Onde procurar metadados: o <head> primeiro e o documento inteiro só
+        se o head não tiver o que se procura (mesmo resultado, sem percorrer
+        o body no caso comum)
         """
-        mapping = {
-            'h1': NodeType.HEADING_1,
-            'h2': NodeType.HEADING_2,
-            'h3': NodeType.HEADING_3,
-            'h4': NodeType.HEADING_4,
-            'p': NodeType.PARAGRAPH,
-            'ol': NodeType.LIST_ORDERED,
-            'ul': NodeType.LIST_UNORDERED,
-            'li': NodeType.LIST_ITEM,
-            'table': NodeType.TABLE,
-            'tr': NodeType.TABLE_ROW,
-            'td': NodeType.TABLE_CELL,
-            'th': NodeType.TABLE_HEADER,
-            'blockquote': NodeType.BLOCKQUOTE,
-            'div': NodeType.DIV,
-            'span': NodeType.SPAN,
-            'a': NodeType.LINK,
-            'strong': NodeType.STRONG,
-            'em': NodeType.EMPHASIS,
-        }
-        return mapping.get(tag_name)
+        if root is None:
+            return []
+        head = root.find('head')
+        return [head, root] if head is not None else [root]
 
-    def _extract_title(self, soup: BeautifulSoup) -> str:
+    def _extract_title(self, root: Optional[etree._Element]) -> str:
         """Extrai título do documento"""
-        title_tag = soup.find('title')
-        return title_tag.get_text().strip() if title_tag else "Untitled"
+        for scope in self._metadata_scopes(root):
+            title_tag = scope.find('.//title')
+            if title_tag is not None:
+                return _text_content(title_tag).strip()
+        return "Untitled"
 
-    def _extract_encoding(self, soup: BeautifulSoup) -> str:
+    def _extract_encoding(self, root: Optional[etree._Element]) -> str:
         """Extrai encoding do documento"""
-        meta = soup.find('meta', attrs={'http-equiv': 'Content-Type'})
-        if meta and 'content' in meta.attrs:
-            content = meta['content']
-            match = re.search(r'charset=([\w-]+)', content)
-            if match:
-                return match.group(1)
+        for scope in self._metadata_scopes(root):
+            for meta in scope.iter('meta'):
+                if meta.get('http-equiv') == 'Content-Type':
+                    content = meta.get('content')
+                    if content is not None:
+                        match = _RE_CHARSET.search(content)
+                        if match:
+                            return match.group(1)
+                    return "utf-8"
         return "utf-8"
 
-    def _extract_css_link(self, soup: BeautifulSoup) -> Optional[str]:
+    def _extract_css_link(self, root: Optional[etree._Element]) -> Optional[str]:
         """Extrai link para arquivo CSS"""
-        link = soup.find('link', attrs={'rel': 'stylesheet'})
-        return link.get('href') if link else None
+        for scope in self._metadata_scopes(root):
+            for link in scope.iter('link'):
+                if 'stylesheet' in _classes_of(link, 'rel'):
+                    return link.get('href')
+        return None
+
+
+@functools.lru_cache(maxsize=PARSED_CACHE_SIZE)
+def _parsed_snapshot(parser_cls: type, path: str, mtime_ns: int, size: int) -> bytes:
+    """
+    Documento parseado e serializado, por classe do parser e versão do arquivo
+
+    A classe faz parte da chave: subclasses (outro PARSER ou métodos
+    sobrescritos) têm entradas próprias e parseiam com a própria classe.
+
+    Guardado como bytes do pickle (gerado aqui mesmo, nunca lido do disco):
+    desserializar é mais barato que parsear e dá uma cópia independente.
+    """
+    with open(path, 'rb') as f:
+        parsed_doc = parser_cls().parse_stream(f, os.path.basename(path))
+    return pickle.dumps(parsed_doc, protocol=pickle.HIGHEST_PROTOCOL)
@@ -0,0 +1,53 @@
+"""
+Configuração de logging com fila
+
+Os registros são só enfileirados na thread que loga; uma thread de fundo
+(QueueListener) formata e escreve no stream. Workers de tradução em paralelo
+não disputam o lock do terminal nem intercalam linhas.
+"""
+import atexit
+import logging
+import logging.handlers
+import queue
+import threading
+from typing import Optional, TextIO
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_setup_lock = threading.Lock()
+
+def setup_queue_logging(
+    level: str = "INFO",
+    fmt: str = "%(asctime)s %(levelname)s %(name)s: %(message)s",
+    stream: Optional[TextIO] = None
+) -> logging.handlers.QueueListener:
+    """
+    Liga o logger raiz a uma fila consumida por uma thread de fundo
+
+    Chamadas seguintes (ex: app.py e um script importados juntos) só ajustam
+    o nível e retornam o listener já criado: um segundo QueueHandler faria
+    cada registro sair duas vezes.
+
+    Args:
+        level: Nível do logger raiz
+        fmt: Formato das mensagens
+        stream: Destino das mensagens (stderr se None)
+
+    Returns:
+        Listener já iniciado (parado automaticamente na saída do processo)
+    """
+    global _listener
+    root = logging.getLogger()
+    with _setup_lock:
+        if _listener is None:
+            log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+            handler = logging.StreamHandler(stream)
+            handler.setFormatter(logging.Formatter(fmt))
+
+            _listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+            _listener.start()
+            atexit.register(_listener.stop)
+
+            root.addHandler(logging.handlers.QueueHandler(log_queue))
+        root.setLevel(level.upper() if isinstance(level, str) else level)
+    return _listener
@@ -1,6 +1,7 @@
 """
 Modelos de dados para representar a estrutura HTML parseada
 """
+from dataclasses import dataclass, field
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel
 from enum import Enum
@@ -37,8 +38,13 @@ class TextType(str, Enum):
     MIXED = "mixed"            # Conteúdo misto
 
 
-class FormattingStyle(BaseModel):
-    """Estilo de formatação aplicado ao texto"""
+# Nós e segmentos são criados aos milhares pelo parser: dataclasses com slots
+# (sem validação nem __dict__). O ParsedDocument continua Pydantic e valida/
+# serializa esses tipos, mantendo o mesmo formato de JSON.
+
+@dataclass(slots=True, frozen=True)
+class FormattingStyle:
+    """Estilo de formatação aplicado ao texto (imutável: instâncias são compartilhadas)"""
     bold: bool = False
     italic: bool = False
     underline: bool = False
@@ -48,34 +54,37 @@ class FormattingStyle(BaseModel):
     padding_left: Optional[str] = None
     text_align: Optional[str] = None
 
-    class Config:
-        extra = "allow"  # Permite campos adicionais
+
+# Formatação vazia (caso mais comum), reutilizada em vez de criar uma por segmento
+EMPTY_FORMATTING = FormattingStyle()
 
 
-class TextSegment(BaseModel):
+@dataclass(slots=True)
+class TextSegment:
     """Segmento de texto com tipo e formatação"""
     text: str
     text_type: TextType
-    formatting: FormattingStyle = FormattingStyle()
+    formatting: FormattingStyle = EMPTY_FORMATTING
     html_class: Optional[str] = None  # Classe CSS original (ex: "foreign", "gloss")
 
 
-class ParsedNode(BaseModel):
+@dataclass(slots=True)
+class ParsedNode:
     """Nó parseado da estrutura HTML"""
     node_type: NodeType
     node_id: Optional[str] = None  # ID do elemento HTML (para referências)
 
     # Conteúdo textual estruturado
-    text_segments: List[TextSegment] = []
+    text_segments: List[TextSegment] = field(default_factory=list)
 
     # Atributos HTML preservados
-    attributes: Dict[str, str] = {}
+    attributes: Dict[str, str] = field(default_factory=dict)
 
     # Formatação inline (style attribute)
     inline_style: Optional[str] = None
 
     # Hierarquia
-    children: List['ParsedNode'] = []
+    children: List['ParsedNode'] = field(default_factory=list)
 
     # Metadados adicionais
     section_number: Optional[str] = None  # Ex: "153", "154a"
@@ -83,10 +92,6 @@ class ParsedNode(BaseModel):
     footnote_id: Optional[str] = None
     has_cross_reference: bool = False
 
-    class Config:
-        # Permite referência circular para children
-        arbitrary_types_allowed = True
-
 
 class TableStructure(BaseModel):
     """Estrutura de tabela com metadados"""
@@ -124,5 +129,54 @@ class ParsedDocument(BaseModel):
     css_file: Optional[str] = None
 
 
-# Permite referência circular
-ParsedNode.model_rebuild()
+@dataclass(slots=True)
+class FlatDocument:
+    """
+    Documento achatado em listas paralelas, em pré-ordem
+
+    Montado em uma passada sobre a árvore; percursos que só precisam dos
+    segmentos em ordem (extração para tradução, contagens) viram laços
+    lineares. Os segmentos são os mesmos objetos do documento: alterar
+    `segments[i].text` altera o ParsedDocument.
+    """
+    node_types: List[NodeType] = field(default_factory=list)
+    node_parents: List[int] = field(default_factory=list)  # -1 = nível superior
+    segments: List[TextSegment] = field(default_factory=list)
+    segment_types: List[TextType] = field(default_factory=list)
+    segment_nodes: List[int] = field(default_factory=list)  # Índice do nó dono
+
+    @classmethod
+    def from_document(cls, parsed_doc: "ParsedDocument") -> "FlatDocument":
+        """Achata `parsed_doc` (pilha explícita, sem recursão)"""
+        flat = cls()
+        node_types = flat.node_types
+        node_parents = flat.node_parents
+        segments = flat.segments
+        segment_types = flat.segment_types
+        segment_nodes = flat.segment_nodes
+
+        stack = [(node, -1) for node in reversed(parsed_doc.nodes)]
+        while stack:
+            node, parent = stack.pop()
+            index = len(node_types)
+            node_types.append(node.node_type)
+            node_parents.append(parent)
+            for segment in node.text_segments:
+                segments.append(segment)
+                segment_types.append(segment.text_type)
+                segment_nodes.append(index)
+            if node.children:
+                stack.extend((child, index) for child in reversed(node.children))
+
+        return flat
+
+
+class TranslationItem(BaseModel):
+    """Tradução de um segmento na resposta estruturada do modelo"""
+    id: str
+    translated: str
+
+
+class TranslationPayload(BaseModel):
+    """Resposta estruturada do modelo ({"translations": [{id, translated}]})"""
+    translations: List[TranslationItem]
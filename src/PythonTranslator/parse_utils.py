@@ -0,0 +1,247 @@
+"""
+Utilitários compartilhados para parsear respostas JSON dos modelos de IA
+"""
+import functools
+import json
+import logging
+import re
+import sys
+import orjson
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from models import TranslationPayload
+
+logger = logging.getLogger(__name__)
+
+
+# Do primeiro "{" ao último "}": ignora ```json ... ``` e texto em volta
+_JSON_BLOCK = re.compile(r"\{.*\}", re.S)
+
+# Espaços e vírgulas entre os itens do array de traduções
+_SKIP_SEPARATORS = re.compile(r"[\s,]*")
+
+# Traduções curtas (rótulos como "Nominativo", "Singular") se repetem muito
+_INTERN_MAX_LEN = 64
+
+# Início do array de traduções ("t" compacto ou "translations")
+_ARRAY_START = re.compile(r'"(?:t|translations)"\s*:\s*\[')
+
+
+def _intern_text(text):
+    """Interna textos curtos: repetições passam a ser o mesmo objeto"""
+    if isinstance(text, str) and len(text) < _INTERN_MAX_LEN:
+        return sys.intern(text)
+    return text
+
+
+@functools.lru_cache(maxsize=1)
+def translation_response_schema() -> Dict[str, Any]:
+    """
+    JSON Schema da resposta estruturada, derivado de TranslationPayload
+
+    As referências ($defs) são expandidas e os títulos removidos: os
+    provedores aceitam só um subconjunto do JSON Schema. Não altere o
+    dicionário retornado (é compartilhado).
+    """
+    schema = TranslationPayload.model_json_schema()
+    return _inline_schema(schema, schema.get("$defs", {}))
+
+
+def _inline_schema(node, defs: Dict[str, Any]):
+    """Copia o schema trocando cada $ref pela definição, sem title e $defs"""
+    if isinstance(node, list):
+        return [_inline_schema(item, defs) for item in node]
+    if not isinstance(node, dict):
+        return node
+    if "$ref" in node:
+        return _inline_schema(defs[node["$ref"].rsplit("/", 1)[-1]], defs)
+    return {
+        key: _inline_schema(value, defs)
+        for key, value in node.items()
+        if key not in ("title", "$defs")
+    }
+
+
+def extract_translations(response_text: str) -> Optional[Dict[str, str]]:
+    """
+    Extrai traduções da resposta JSON do modelo
+
+    Usado quando a resposta não pôde ser lida durante o streaming (JSON em
+    formato inesperado). O parse é memoizado pelo texto da resposta: uma
+    nova tentativa que recebe a mesma resposta não repete o orjson.loads, e
+    cada chamada recebe um dicionário novo (alterá-lo não corrompe o cache).
+
+    Args:
+        response_text: Texto da resposta
+
+    Returns:
+        Dicionário {id: texto_traduzido} ou None se falhar
+    """
+    pairs = _extract_translations(response_text)
+    return dict(pairs) if pairs else None
+
+
+@functools.lru_cache(maxsize=512)
+def _extract_translations(response_text: str) -> Optional[Tuple[Tuple[str, str], ...]]:
+    """Versão memoizada por resposta (pares imutáveis, ver extract_translations)"""
+    try:
+        # Localizar o objeto JSON (com ou sem markdown code block)
+        match = _JSON_BLOCK.search(response_text)
+        if not match:
+            logger.error("Nenhum objeto JSON na resposta")
+            logger.debug("Resposta recebida: %s...", response_text[:500])
+            return None
+
+        # Parsear JSON
+        data = orjson.loads(match.group(0))
+
+        # Extrair traduções (formato compacto {"t": [[id, texto]]} ou o antigo)
+        if "t" in data:
+            translations = {
+                _intern_text(pair[0]): _intern_text(pair[1])
+                for pair in data["t"]
+                if isinstance(pair, list) and len(pair) >= 2
+            }
+        else:
+            translations = {
+                _intern_text(item["id"]): _intern_text(item["translated"])
+                for item in data.get("translations", ())
+                if "id" in item and "translated" in item
+            }
+
+        return tuple(translations.items()) if translations else None
+
+    except orjson.JSONDecodeError as e:
+        logger.error("Falha ao parsear JSON: %s", e)
+        logger.debug("Resposta recebida: %s...", response_text[:500])
+        return None
+    except Exception as e:
+        logger.error("Erro ao processar resposta: %s", e)
+        return None
+
+
+class StreamingTranslationParser:
+    """
+    Extrai traduções de uma resposta que ainda está chegando
+
+    Cada par [id, tradução] do array "t" (ou objeto {"id", "translated"} do
+    formato antigo) é decodificado assim que termina de chegar, então o parse acontece enquanto o resto da
+    resposta ainda está na rede e a leitura pode parar quando todos os
+    segmentos esperados já chegaram. IDs que não foram pedidos são
+    descartados: não contam para o fim da leitura nem vão para o resultado.
+    """
+
+    _decoder = json.JSONDecoder()
+
+    def __init__(self, expected: Iterable[str], on_item: Optional[Callable[[str, str], None]] = None):
+        """
+        Args:
+            expected: IDs dos segmentos enviados ao modelo
+            on_item: Chamado com (id, tradução) assim que cada par é decodificado
+        """
+        self.expected = frozenset(expected)
+        self.on_item = on_item
+        self.truncated = False  # Provedor parou por limite de tokens de saída
+        self.translations: Dict[str, str] = {}
+        self._chunks: List[str] = []
+        self._buffer = ""
+        self._pos = -1  # Posição dentro do array (-1 = array ainda não encontrado)
+        self._closed = False
+
+    @property
+    def text(self) -> str:
+        """Texto recebido até agora"""
+        return "".join(self._chunks)
+
+    def feed(self, chunk: str) -> bool:
+        """
+        Adiciona um pedaço da resposta
+
+        Args:
+            chunk: Texto recebido
+
+        Returns:
+            True quando todos os segmentos esperados já foram extraídos
+        """
+        self._chunks.append(chunk)
+        if self._closed:
+            return self.done
+
+        self._buffer += chunk
+        if self._pos < 0:
+            self._find_array()
+        if self._pos >= 0:
+            self._drain()
+        return self.done
+
+    @property
+    def done(self) -> bool:
+        """Todos os IDs pedidos já foram extraídos"""
+        return len(self.translations) >= len(self.expected)
+
+    @property
+    def complete(self) -> bool:
+        """
+        Todos os segmentos chegaram e a resposta não foi cortada
+
+        Em resultados incompletos os IDs que faltam são pedidos de novo por
+        quem chamou.
+        """
+        return self.done and not self.truncated
+
+    def result(self) -> Optional[Dict[str, str]]:
+        """
+        Traduções finais ({id: texto_traduzido} ou None se falhar)
+
+        Se nada foi extraído durante o streaming, tenta o parse da resposta
+        inteira (ex: JSON em formato inesperado). Pode ser parcial: veja
+        `complete`.
+        """
+        if self.translations:
+            return dict(self.translations)
+        parsed = extract_translations(self.text)
+        if not parsed:
+            return None
+        return {seg_id: text for seg_id, text in parsed.items() if seg_id in self.expected} or None
+
+    def _find_array(self):
+        """Posiciona o cursor logo após o "[" do array de traduções"""
+        match = _ARRAY_START.search(self._buffer)
+        if match:
+            self._pos = match.end()
+
+    def _drain(self):
+        """Decodifica todos os itens completos a partir do cursor"""
+        buffer = self._buffer
+        pos = self._pos
+        while True:
+            pos = _SKIP_SEPARATORS.match(buffer, pos).end()
+            if pos >= len(buffer):
+                break
+            if buffer[pos] not in "[{":
+                # Fim do array (ou lixo): nada mais a extrair
+                self._closed = True
+                break
+            try:
+                item, end = self._decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                break  # Item ainda incompleto
+            if isinstance(item, list) and len(item) >= 2:
+                self._add(item[0], item[1])
+            elif isinstance(item, dict) and "id" in item and "translated" in item:
+                self._add(item["id"], item["translated"])
+            pos = end
+
+        # Descartar o que já foi consumido
+        self._buffer = buffer[pos:]
+        self._pos = 0
+
+    def _add(self, seg_id, text):
+        """Registra um par decodificado e avisa o callback"""
+        if not isinstance(seg_id, str) or seg_id not in self.expected:
+            logger.warning("ID não pedido na resposta, descartado: %r", seg_id)
+            return
+        seg_id = _intern_text(seg_id)
+        text = _intern_text(text)
+        self.translations[seg_id] = text
+        if self.on_item is not None and isinstance(text, str):
+            self.on_item(seg_id, text)
@@ -0,0 +1,256 @@
+"""
+Controle de taxa e retry para chamadas às APIs de IA
+
+Um token bucket por provedor limita requisições/minuto e tokens/minuto do
+lado do cliente, e `retry_on` refaz chamadas que falharam por limite de taxa
+ou sobrecarga com backoff exponencial (respeitando `retry-after`).
+`AdaptiveConcurrency` ajusta quantas chamadas ficam em voo com AIMD.
+"""
+import asyncio
+import functools
+import inspect
+import logging
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple, Type
+
+logger = logging.getLogger(__name__)
+
+
+# Limites padrão por provedor (ajuste ao plano da conta)
+TRANSLATOR_RPM = int(os.getenv("TRANSLATOR_RPM", "50"))
+TRANSLATOR_TPM = int(os.getenv("TRANSLATOR_TPM", "40000"))
+
+
+class TokenBucket:
+    """Token bucket thread-safe: `rate` unidades por minuto, até `capacity` acumuladas"""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, amount: float) -> float:
+        """
+        Reserva `amount` unidades
+
+        Returns:
+            Segundos a esperar antes de usar a reserva (0 se disponível já)
+        """
+        amount = min(amount, self.capacity)  # Pedido maior que o balde esperaria para sempre
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= amount
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self, amount: float = 1):
+        """Bloqueia até haver `amount` unidades disponíveis"""
+        wait = self._reserve(amount)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, amount: float = 1):
+        """Versão assíncrona de acquire"""
+        wait = self._reserve(amount)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class RateLimiter:
+    """Limite combinado de requisições por minuto e tokens por minuto"""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+
+    def acquire(self, tokens: int):
+        """Espera liberar uma requisição com ~`tokens` tokens"""
+        self.requests.acquire()
+        self.tokens.acquire(tokens)
+
+    async def acquire_async(self, tokens: int):
+        """Versão assíncrona de acquire"""
+        await self.requests.acquire_async()
+        await self.tokens.acquire_async(tokens)
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(provider: str) -> RateLimiter:
+    """
+    Limitador compartilhado por provedor (todas as instâncias usam a mesma cota)
+
+    Args:
+        provider: Nome do provedor ("claude", "gemini")
+
+    Returns:
+        RateLimiter do provedor
+    """
+    with _limiters_lock:
+        if provider not in _limiters:
+            _limiters[provider] = RateLimiter(TRANSLATOR_RPM, TRANSLATOR_TPM)
+        return _limiters[provider]
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimativa grosseira de tokens (~4 caracteres por token)"""
+    return len(text) // 4 + 1
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Lê o header retry-after da resposta HTTP do erro, se houver"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class AdaptiveConcurrency:
+    """
+    Limite de concorrência AIMD (aumento aditivo, redução multiplicativa)
+
+    Funciona como um semáforo assíncrono cujo tamanho muda em tempo de
+    execução: cada janela de `limit` sucessos soma 1 ao limite e cada erro
+    de limite de taxa (429) o reduz à metade.
+    """
+
+    def __init__(self, initial: int = 4, minimum: int = 1, maximum: int = 32):
+        self.limit = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self._in_flight = 0
+        self._successes = 0
+        self._condition: Optional[asyncio.Condition] = None
+        self._loop = None
+
+    def on_success(self):
+        """Aumento aditivo: +1 após `limit` sucessos seguidos"""
+        self._successes += 1
+        if self._successes >= self.limit:
+            self._successes = 0
+            self.limit = min(self.maximum, self.limit + 1)
+
+    def on_rate_limited(self):
+        """Redução multiplicativa: limite pela metade"""
+        self._successes = 0
+        new_limit = max(self.minimum, self.limit // 2)
+        if new_limit != self.limit:
+            logger.warning("[AIMD] Limite de taxa atingido, concorrência %d -> %d", self.limit, new_limit)
+        self.limit = new_limit
+
+    def _get_condition(self) -> asyncio.Condition:
+        """Condition do event loop atual (asyncio.run cria um loop por execução)"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._condition = asyncio.Condition()
+            self._in_flight = 0
+        return self._condition
+
+    async def __aenter__(self):
+        condition = self._get_condition()
+        async with condition:
+            await condition.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+        return self
+
+    async def __aexit__(self, *exc_info):
+        condition = self._get_condition()
+        async with condition:
+            self._in_flight -= 1
+            condition.notify_all()
+
+
+def retry_on(
+    exceptions: Tuple[Type[Exception], ...],
+    max_tries: int = 8,
+    base_delay: float = 1.0,
+    max_delay: float = 60.0,
+    label: str = "API",
+    rate_limit_errors: Tuple[Type[Exception], ...] = ()
+) -> Callable:
+    """
+    Decorator de retry com backoff exponencial e jitter completo
+
+    Funciona em funções síncronas e assíncronas. Quando o erro traz
+    `retry-after`, esse valor é usado como espera.
+
+    Em métodos cuja instância tem `propagate_rate_limits` verdadeiro, os
+    erros de `rate_limit_errors` sobem na hora, sem backoff: quem chamou
+    (SectionTranslator no modo adaptativo) reduz a concorrência e decide a
+    espera.
+
+    Args:
+        exceptions: Exceções que disparam nova tentativa
+        max_tries: Total de tentativas (incluindo a primeira)
+        base_delay: Espera base em segundos
+        max_delay: Espera máxima em segundos
+        label: Prefixo dos logs
+        rate_limit_errors: Erros de limite de taxa (429) entre `exceptions`
+
+    Returns:
+        Decorator
+    """
+    def delay_for(attempt: int, error: Exception) -> float:
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None:
+            return min(retry_after, max_delay)
+        return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+    def propagates(args, error: Exception) -> bool:
+        return (
+            isinstance(error, rate_limit_errors)
+            and bool(args)
+            and getattr(args[0], "propagate_rate_limits", False)
+        )
+
+    def report(attempt: int, error: Exception, delay: float):
+        logger.warning(
+            "[%s] %s (tentativa %d/%d), aguardando %.1fs...",
+            label, type(error).__name__, attempt + 1, max_tries, delay
+        )
+
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                for attempt in range(max_tries):
+                    try:
+                        return await func(*args, **kwargs)
+                    except exceptions as e:
+                        if attempt == max_tries - 1 or propagates(args, e):
+                            raise
+                        delay = delay_for(attempt, e)
+                        report(attempt, e, delay)
+                        await asyncio.sleep(delay)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            for attempt in range(max_tries):
+                try:
+                    return func(*args, **kwargs)
+                except exceptions as e:
+                    if attempt == max_tries - 1 or propagates(args, e):
+                        raise
+                    delay = delay_for(attempt, e)
+                    report(attempt, e, delay)
+                    time.sleep(delay)
+        return wrapper
+
+    return decorator
@@ -0,0 +1,15 @@
+"""
+Utilitários de saída compartilhados pelos scripts de teste
+"""
+import io
+import sys
+from contextlib import contextmanager, redirect_stdout
+
+
+@contextmanager
+def buffered_report():
+    """Acumula os prints do bloco em memória e escreve tudo de uma vez no final"""
+    buffer = io.StringIO()
+    with redirect_stdout(buffer):
+        yield
+    sys.stdout.write(buffer.getvalue())
@@ -0,0 +1,159 @@
+"""
+Micro-batching de seções para a API de IA
+
+Requisições concorrentes ao /translate chegam com seções pequenas; em vez de
+pagar uma chamada (e o prompt fixo com glossário e regras) por requisição, as
+seções que chegam dentro de uma janela curta são unidas em uma única chamada
+a `translate_section` e o resultado é redistribuído para cada requisição.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional
+from translation_strategy import (
+    TranslationStrategy, SectionData, TranslationResult, merge_sections, split_translations
+)
+
+
+@dataclass
+class _PendingSection:
+    """Seção aguardando na fila do batcher"""
+    section: SectionData
+    future: Future
+
+
+class BatchingTranslator(TranslationStrategy):
+    """
+    Estratégia que agrupa seções concorrentes antes de delegar a outra estratégia
+
+    Cada chamada a `translate_section` entra numa fila; uma thread de fundo
+    drena a fila por até `max_wait_ms` (ou até juntar `max_batch_segments`
+    segmentos) e entrega o lote a um pool, que o envia em uma única chamada à
+    estratégia real. Lotes diferentes são traduzidos em paralelo.
+    """
+
+    def __init__(
+        self,
+        strategy: TranslationStrategy,
+        max_batch_segments: int = 40,
+        max_wait_ms: int = 50,
+        max_workers: int = 8
+    ):
+        super().__init__(
+            strategy.api_key,
+            strategy.glossary,
+            glossary_text=strategy._glossary_text,
+            glossary_hash=strategy.glossary_hash(),
+            structured_output=strategy.structured_output,
+            glossary_index=strategy.glossary_index
+        )
+        self.strategy = strategy
+        self.max_batch_segments = max_batch_segments
+        self.max_wait = max_wait_ms / 1000
+
+        self._queue: "queue.Queue[_PendingSection]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+        # Chamadas à IA em voo ao mesmo tempo (o coletor nunca espera por elas)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="section-batch")
+
+    def get_provider_name(self) -> str:
+        return self.strategy.get_provider_name()
+
+    def enable_rate_limit_passthrough(self):
+        super().enable_rate_limit_passthrough()
+        self.strategy.enable_rate_limit_passthrough()
+
+    async def aclose(self):
+        await self.strategy.aclose()
+
+    def translate_section(self, section: SectionData) -> TranslationResult:
+        """Enfileira a seção e bloqueia até o lote correspondente ser traduzido"""
+        self._ensure_worker()
+        future: Future = Future()
+        self._queue.put(_PendingSection(section, future))
+        return future.result()
+
+    def _ensure_worker(self):
+        """Inicia a thread de fundo na primeira chamada"""
+        if self._worker is not None:
+            return
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name="section-batcher", daemon=True
+                )
+                self._worker.start()
+
+    def _run(self):
+        """Loop da thread de fundo: coleta um lote e entrega ao pool"""
+        while True:
+            self._pool.submit(self._dispatch_safely, self._collect_batch())
+
+    def _dispatch_safely(self, batch: List[_PendingSection]):
+        """Despacha o lote; qualquer erro vira falha para as seções ainda pendentes"""
+        try:
+            self._dispatch(batch)
+        except Exception as e:
+            for pending in batch:
+                if not pending.future.done():
+                    pending.future.set_result(self._failure(f"Erro no batcher: {str(e)}"))
+
+    def _collect_batch(self) -> List[_PendingSection]:
+        """Espera a primeira seção e junta as que chegarem dentro da janela"""
+        first = self._queue.get()
+        batch = [first]
+        total = len(first.section.segments_to_translate)
+
+        deadline = time.monotonic() + self.max_wait
+        while total < self.max_batch_segments:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                pending = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(pending)
+            total += len(pending.section.segments_to_translate)
+
+        return batch
+
+    def _dispatch(self, batch: List[_PendingSection]):
+        """Envia o lote em uma única chamada e distribui os resultados"""
+        if len(batch) == 1:
+            batch[0].future.set_result(self.strategy.translate_section(batch[0].section))
+            return
+
+        merged, prefixes = merge_sections([p.section for p in batch])
+        result = self.strategy.translate_section(merged)
+
+        if not result.success:
+            for pending in batch:
+                pending.future.set_result(self._failure(result.error_message))
+            return
+
+        parts = split_translations(result.translated_segments, prefixes)
+        total = len(merged.segments_to_translate) or 1
+        for pending, translations in zip(batch, parts):
+            tokens = None
+            if result.tokens_used:
+                share = len(pending.section.segments_to_translate) / total
+                tokens = int(result.tokens_used * share)
+            pending.future.set_result(TranslationResult(
+                success=bool(translations),
+                translated_segments=translations,
+                error_message=None if translations else "Lote retornou sem traduções para a seção",
+                tokens_used=tokens,
+                provider=result.provider
+            ))
+
+    def _failure(self, message: Optional[str]) -> TranslationResult:
+        return TranslationResult(
+            success=False,
+            translated_segments={},
+            error_message=message,
+            provider=self.get_provider_name()
+        )
@@ -0,0 +1,115 @@
+"""
+Pipeline parse → HTML em uma única passada
+
+Em vez de materializar o ParsedDocument inteiro e depois percorrê-lo de novo
+no HtmlGenerator, o HTML de entrada é lido com `etree.iterparse` e cada
+elemento de nível superior do <body> é parseado, (opcionalmente)
+transformado e escrito assim que termina. Os elementos já processados são
+descartados, então o pico de memória fica limitado ao maior bloco de nível
+superior, não ao documento.
+
+A tradução por IA continua usando o documento completo (uma única chamada
+por documento); este pipeline serve para renderização e para aplicar
+traduções já conhecidas (ex: cache) via `transform`.
+"""
+import io
+from typing import BinaryIO, Callable, Dict, Iterator, Optional, Union
+from html_parser import LatinGrammarParser
+from html_generator import HtmlGenerator
+from models import ParsedNode
+
+
+# Fonte aceita pelo iterparse: caminho do arquivo ou arquivo binário aberto
+HtmlSource = Union[str, BinaryIO]
+
+
+class StreamingPipeline:
+    """Parse e geração de HTML fundidos, um nó de nível superior por vez"""
+
+    def __init__(
+        self,
+        parser: Optional[LatinGrammarParser] = None,
+        generator: Optional[HtmlGenerator] = None,
+        transform: Optional[Callable[[ParsedNode], None]] = None
+    ):
+        """
+        Args:
+            parser: Parser usado para cada bloco (padrão: LatinGrammarParser())
+            generator: Gerador usado na saída (padrão: HtmlGenerator())
+            transform: Função aplicada a cada nó antes de ser escrito
+        """
+        self.parser = parser or LatinGrammarParser()
+        self.generator = generator or HtmlGenerator()
+        self.transform = transform
+
+    @staticmethod
+    def from_string(html_content: str) -> BinaryIO:
+        """Adapta conteúdo HTML em memória para fonte do pipeline (leia com encoding='utf-8')"""
+        return io.BytesIO(html_content.encode('utf-8'))
+
+    def iter_nodes(self, source: HtmlSource, encoding: Optional[str] = None) -> Iterator[ParsedNode]:
+        """
+        Parseia o documento em fluxo, produzindo cada nó de nível superior
+
+        O título (primeiro <title>) fica disponível em `self.title` quando o
+        primeiro nó é produzido. As estatísticas acumulam em `self.parser.stats`.
+
+        Args:
+            source: Caminho ou arquivo binário com o HTML
+            encoding: Encoding do HTML de entrada (None detecta pelo <meta charset>)
+
+        Yields:
+            ParsedNode de cada elemento de nível superior do <body>
+        """
+        for parsed in self.parser.iter_stream(source, encoding):
+            if self.transform is not None:
+                self.transform(parsed)
+            yield parsed
+
+    @property
+    def title(self) -> str:
+        """Título do documento em processamento"""
+        return self.parser.metadata["title"]
+
+    def write(self, source: HtmlSource, fp, encoding: Optional[str] = None) -> Dict[str, int]:
+        """
+        Converte o HTML de `source` e escreve o resultado em `fp`
+
+        Args:
+            source: Caminho ou arquivo binário com o HTML
+            fp: Arquivo de texto aberto para escrita
+            encoding: Encoding do HTML de entrada (None detecta pelo <meta charset>)
+
+        Returns:
+            Estatísticas do parse
+        """
+        generator = self.generator
+        header_written = False
+
+        for node in self.iter_nodes(source, encoding):
+            # O <title> vem no <head>, antes do primeiro nó do <body>
+            if not header_written:
+                generator.write_header(self.title, fp)
+                header_written = True
+            generator.write_top_level_node(node, fp)
+
+        if not header_written:
+            generator.write_header(self.title, fp)
+        generator.write_footer(fp)
+
+        return self.parser.stats
+
+    def run(self, source: HtmlSource, output_path: str, encoding: Optional[str] = None) -> Dict[str, int]:
+        """
+        Converte o HTML de `source` e salva em `output_path`
+
+        Args:
+            source: Caminho ou arquivo binário com o HTML
+            output_path: Caminho do .html gerado
+            encoding: Encoding do HTML de entrada (None detecta pelo <meta charset>)
+
+        Returns:
+            Estatísticas do parse
+        """
+        with open(output_path, 'w', encoding='utf-8') as f:
+            return self.write(source, f, encoding)
@@ -1,18 +1,24 @@
 """
 Teste do pipeline completo: HTML → Parser → Tradução → Word + HTML
 """
+import asyncio
 import os
 import sys
 from html_parser import LatinGrammarParser
-from translator_factory import TranslatorFactory
-from translation_strategy import SectionTranslator
-from word_generator import SimpleWordGenerator
+from logging_setup import setup_queue_logging
 from html_generator import HtmlGenerator
 
 # Fix encoding para Windows
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8')
 
+# Separadores dos relatórios
+BANNER = "=" * 80
+RULE = "─" * 80
+
+# Logs do tradutor no console (via fila), junto com os prints do script
+setup_queue_logging(fmt="%(message)s", stream=sys.stdout)
+
 
 def full_pipeline_test(
     html_file: str,
@@ -20,7 +26,8 @@ def full_pipeline_test(
     output_html: str = None,
     provider: str = "gemini",
     api_key: str = None,
-    skip_translation: bool = False
+    skip_translation: bool = False,
+    use_cache: bool = True
 ):
     """
     Pipeline completo: HTML → Parser → Tradução → Word + HTML
@@ -32,15 +39,11 @@ def full_pipeline_test(
         provider: Provedor de tradução ('gemini' ou 'claude')
         api_key: Chave da API (ou usa variável de ambiente)
         skip_translation: Se True, pula tradução (apenas testa parser + Word)
+        use_cache: Se True, reaproveita traduções do cache em disco (TRANSLATION_CACHE_DIR)
     """
-    print(f"\n{'='*80}")
+    print(f"\n{BANNER}")
     print(f"PIPELINE COMPLETO - Latin Grammar Translator")
-    print(f"{'='*80}\n")
-
-    # Verificar arquivos
-    if not os.path.exists(html_file):
-        print(f"[ERRO] Arquivo não encontrado: {html_file}")
-        return
+    print(f"{BANNER}\n")
 
     # Gerar nome do HTML se não especificado
     if output_html is None:
@@ -55,31 +58,35 @@ def full_pipeline_test(
     # ========================================================================
     # PASSO 1: PARSEAR HTML
     # ========================================================================
-    print(f"{'─'*80}")
+    print(RULE)
     print(f"PASSO 1: Parseando HTML...")
-    print(f"{'─'*80}\n")
-
-    with open(html_file, 'r', encoding='utf-8') as f:
-        html_content = f.read()
+    print(f"{RULE}\n")
 
+    # Parse em fluxo, reaproveitando o resultado salvo enquanto o arquivo não mudar
     parser = LatinGrammarParser()
-    parsed_doc = parser.parse_html(html_content, os.path.basename(html_file))
+    try:
+        parsed_doc = parser.parse_html_cached(html_file)
+    except FileNotFoundError:
+        print(f"[ERRO] Arquivo não encontrado: {html_file}")
+        return
+    stats = parsed_doc.stats
+    translatable = stats['english_segments'] + stats['gloss_segments']
 
     print(f"[OK] HTML parseado com sucesso")
     print(f"  - Título: {parsed_doc.title}")
-    print(f"  - Nós: {parsed_doc.stats['total_nodes']}")
-    print(f"  - Segmentos: {parsed_doc.stats['text_segments']}")
-    print(f"  - Latim: {parsed_doc.stats['latin_segments']}")
-    print(f"  - Inglês: {parsed_doc.stats['english_segments']}")
-    print(f"  - Gloss: {parsed_doc.stats['gloss_segments']}\n")
+    print(f"  - Nós: {stats['total_nodes']}")
+    print(f"  - Segmentos: {stats['text_segments']}")
+    print(f"  - Latim: {stats['latin_segments']}")
+    print(f"  - Inglês: {stats['english_segments']}")
+    print(f"  - Gloss: {stats['gloss_segments']}\n")
 
     # ========================================================================
     # PASSO 2: TRADUZIR (se não for skip)
     # ========================================================================
     if not skip_translation:
-        print(f"{'─'*80}")
+        print(RULE)
         print(f"PASSO 2: Traduzindo com IA...")
-        print(f"{'─'*80}\n")
+        print(f"{RULE}\n")
 
         # Verificar API key
         if not api_key:
@@ -91,12 +98,18 @@ def full_pipeline_test(
                 return
 
         try:
+            # SDKs de IA só são importados quando há tradução (segundos de import)
+            from translator_factory import TranslatorFactory
+            from translation_strategy import SectionTranslator
+            from translation_cache import set_cache_enabled
+
             # Criar tradutor
+            set_cache_enabled(use_cache)
             strategy = TranslatorFactory.create(provider, api_key)
-            translator = SectionTranslator(strategy, max_retries=3)
+            translator = SectionTranslator(strategy, adaptive=True)
 
             # Traduzir
-            parsed_doc = translator.translate_document(parsed_doc)
+            parsed_doc = asyncio.run(_translate_document(translator, parsed_doc))
 
             print(f"[OK] Tradução concluída\n")
 
@@ -105,16 +118,16 @@ def full_pipeline_test(
             print(f"       Use --skip-translation para testar sem traduzir\n")
             return
     else:
-        print(f"{'─'*80}")
+        print(RULE)
         print(f"PASSO 2: Pulando tradução (modo teste)")
-        print(f"{'─'*80}\n")
+        print(f"{RULE}\n")
 
     # ========================================================================
     # PASSO 3: GERAR HTML
     # ========================================================================
-    print(f"{'─'*80}")
+    print(RULE)
     print(f"PASSO 3: Gerando HTML traduzido...")
-    print(f"{'─'*80}\n")
+    print(f"{RULE}\n")
 
     try:
         html_gen = HtmlGenerator()
@@ -132,11 +145,13 @@ def full_pipeline_test(
     # ========================================================================
     # PASSO 4: GERAR WORD
     # ========================================================================
-    print(f"{'─'*80}")
+    print(RULE)
     print(f"PASSO 4: Gerando documento Word...")
-    print(f"{'─'*80}\n")
+    print(f"{RULE}\n")
 
     try:
+        from word_generator import SimpleWordGenerator
+
         generator = SimpleWordGenerator()
         generator.generate_from_parsed(parsed_doc, output_word)
 
@@ -152,19 +167,25 @@ def full_pipeline_test(
     # ========================================================================
     # RESUMO FINAL
     # ========================================================================
-    print(f"{'='*80}")
+    print(BANNER)
     print(f"PIPELINE CONCLUÍDO COM SUCESSO!")
-    print(f"{'='*80}")
+    print(BANNER)
     print(f"\nResumo:")
-    print(f"  1. HTML parseado: {parsed_doc.stats['total_nodes']} nós")
+    print(f"  1. HTML parseado: {stats['total_nodes']} nós")
     if not skip_translation:
-        print(f"  2. Tradução: {parsed_doc.stats['english_segments'] + parsed_doc.stats['gloss_segments']} segmentos")
+        print(f"  2. Tradução: {translatable} segmentos")
     else:
         print(f"  2. Tradução: PULADA (modo teste)")
     print(f"  3. HTML traduzido: {output_html}")
     print(f"  4. Word gerado: {output_word}")
     print(f"\nAbra os arquivos para ver o resultado!")
-    print(f"{'='*80}\n")
+    print(f"{BANNER}\n")
+
+
+async def _translate_document(translator, parsed_doc):
+    """Traduz o documento e fecha os clientes assíncronos antes do loop acabar"""
+    async with translator:
+        return await translator.translate_document_async(parsed_doc)
 
 
 def main():
@@ -202,6 +223,11 @@ def main():
         action="store_true",
         help="Pular tradução (apenas testar parser + Word)"
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Não usar o cache de traduções em disco (TRANSLATION_CACHE_DIR)"
+    )
 
     args = parser.parse_args()
 
@@ -212,16 +238,17 @@ def main():
         output_html=args.output_html,
         provider=args.provider,
         api_key=args.api_key,
-        skip_translation=args.skip_translation
+        skip_translation=args.skip_translation,
+        use_cache=not args.no_cache
     )
 
 
 if __name__ == "__main__":
     # Se não tiver argumentos, mostrar ajuda
     if len(sys.argv) == 1:
-        print("\n" + "="*80)
+        print("\n" + BANNER)
         print("PIPELINE COMPLETO - Latin Grammar Translator")
-        print("="*80)
+        print(BANNER)
         print("\nModo de uso:")
         print("\n1. Teste rápido SEM tradução (apenas parser + HTML + Word):")
         print("   python test_full_pipeline.py --skip-translation")
@@ -234,18 +261,14 @@ if __name__ == "__main__":
         print("\nVariáveis de ambiente:")
         print("  Windows: set GEMINI_API_KEY=sua_chave")
         print("  Linux:   export GEMINI_API_KEY=sua_chave")
-        print("\n" + "="*80 + "\n")
-
-        # Tentar executar teste sem tradução
-        if os.path.exists("../Resources/alphabet.htm"):
-            print("[INFO] Executando teste rápido sem tradução...\n")
-            full_pipeline_test(
-                html_file="../Resources/alphabet.htm",
-                output_word="test_output.docx",
-                skip_translation=True
-            )
-        else:
-            print("[AVISO] Arquivo alphabet.htm não encontrado.")
-            print("        Execute a partir da pasta PythonTranslator/\n")
+        print("\n" + BANNER + "\n")
+
+        # Tentar executar teste sem tradução (execute a partir da pasta PythonTranslator/)
+        print("[INFO] Executando teste rápido sem tradução...\n")
+        full_pipeline_test(
+            html_file="../Resources/alphabet.htm",
+            output_word="test_output.docx",
+            skip_translation=True
+        )
     else:
         main()
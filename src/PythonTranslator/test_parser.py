@@ -1,36 +1,40 @@
 """
 Script de teste para o parser HTML
 """
+import glob
 import os
 import sys
-import json
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 from html_parser import LatinGrammarParser
+from report_utils import buffered_report
 
 # Fix encoding for Windows console
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8')
 
 
-def test_parser_with_file(filepath: str):
+# Separadores dos relatórios
+BANNER = "=" * 80
+
+
+def test_parser_with_file(filepath: str, quiet: bool = False):
     """
     Testa o parser com um arquivo HTML real
 
     Args:
         filepath: Caminho para o arquivo HTML
+        quiet: Se True, não lista os primeiros nós
     """
-    print(f"\n{'='*80}")
+    print(f"\n{BANNER}")
     print(f"Testando parser com: {os.path.basename(filepath)}")
-    print(f"{'='*80}\n")
+    print(f"{BANNER}\n")
 
-    # Ler arquivo
-    with open(filepath, 'r', encoding='utf-8') as f:
-        html_content = f.read()
+    print(f"[OK] Arquivo: {os.path.getsize(filepath)} bytes\n")
 
-    print(f"[OK] Arquivo lido: {len(html_content)} caracteres\n")
-
-    # Parsear
+    # Parsear (reaproveita o resultado salvo enquanto o arquivo não mudar)
     parser = LatinGrammarParser()
-    parsed_doc = parser.parse_html(html_content, os.path.basename(filepath))
+    parsed_doc = parser.parse_html_cached(filepath)
 
     # Mostrar informações básicas
     print(f"Titulo: {parsed_doc.title}")
@@ -39,49 +43,93 @@ def test_parser_with_file(filepath: str):
     print(f"Arquivo: {parsed_doc.original_filename}\n")
 
     # Estatísticas
+    stats = parsed_doc.stats
     print("ESTATISTICAS:")
-    print(f"  - Total de nos: {parsed_doc.stats['total_nodes']}")
-    print(f"  - Segmentos de texto: {parsed_doc.stats['text_segments']}")
-    print(f"  - Segmentos em latim: {parsed_doc.stats['latin_segments']}")
-    print(f"  - Segmentos em ingles: {parsed_doc.stats['english_segments']}")
-    print(f"  - Segmentos de gloss: {parsed_doc.stats['gloss_segments']}")
-    print(f"  - Tabelas: {parsed_doc.stats['tables']}")
-    print(f"  - Listas: {parsed_doc.stats['lists']}\n")
-
-    # Mostrar primeiros nós
-    print("PRIMEIROS NOS (ate 5):")
-    for i, node in enumerate(parsed_doc.nodes[:5]):
-        print(f"\n  [{i+1}] {node.node_type}")
-        if node.node_id:
-            print(f"      ID: {node.node_id}")
-        if node.section_number:
-            print(f"      Secao: {node.section_number}")
-
-        # Mostrar segmentos de texto
-        if node.text_segments:
-            print(f"      Segmentos de texto: {len(node.text_segments)}")
-            for j, segment in enumerate(node.text_segments[:3]):  # Max 3 por nó
-                text_preview = segment.text[:50] + "..." if len(segment.text) > 50 else segment.text
-                print(f"        [{j+1}] {segment.text_type}: \"{text_preview}\"")
-                if segment.formatting.bold or segment.formatting.italic:
-                    styles = []
-                    if segment.formatting.bold:
-                        styles.append("negrito")
-                    if segment.formatting.italic:
-                        styles.append("italico")
-                    print(f"            Formatacao: {', '.join(styles)}")
-
-        # Mostrar filhos
-        if node.children:
-            print(f"      Filhos: {len(node.children)}")
-
-    print(f"\n{'='*80}")
+    print(f"  - Total de nos: {stats['total_nodes']}")
+    print(f"  - Segmentos de texto: {stats['text_segments']}")
+    print(f"  - Segmentos em latim: {stats['latin_segments']}")
+    print(f"  - Segmentos em ingles: {stats['english_segments']}")
+    print(f"  - Segmentos de gloss: {stats['gloss_segments']}")
+    print(f"  - Tabelas: {stats['tables']}")
+    print(f"  - Listas: {stats['lists']}\n")
+
+    # Mostrar primeiros nós (saída acumulada e escrita de uma vez)
+    if not quiet:
+        with buffered_report():
+            print("PRIMEIROS NOS (ate 5):")
+            for i, node in enumerate(parsed_doc.nodes[:5]):
+                print(f"\n  [{i+1}] {node.node_type}")
+                if node.node_id:
+                    print(f"      ID: {node.node_id}")
+                if node.section_number:
+                    print(f"      Secao: {node.section_number}")
+
+                # Mostrar segmentos de texto
+                if node.text_segments:
+                    print(f"      Segmentos de texto: {len(node.text_segments)}")
+                    for j, segment in enumerate(node.text_segments[:3]):  # Max 3 por nó
+                        text_preview = segment.text[:50] + "..." if len(segment.text) > 50 else segment.text
+                        print(f"        [{j+1}] {segment.text_type}: \"{text_preview}\"")
+                        if segment.formatting.bold or segment.formatting.italic:
+                            styles = []
+                            if segment.formatting.bold:
+                                styles.append("negrito")
+                            if segment.formatting.italic:
+                                styles.append("italico")
+                            print(f"            Formatacao: {', '.join(styles)}")
+
+                # Mostrar filhos
+                if node.children:
+                    print(f"      Filhos: {len(node.children)}")
+
+    print(f"\n{BANNER}")
     print("TESTE CONCLUIDO COM SUCESSO!")
-    print(f"{'='*80}\n")
+    print(f"{BANNER}\n")
 
     return parsed_doc
 
 
+def _parse_one(path: str):
+    """Parseia um arquivo em um processo do pool (só as estatísticas voltam)"""
+    with open(path, 'rb') as f:
+        parsed_doc = LatinGrammarParser().parse_stream(f, os.path.basename(path))
+    return parsed_doc.original_filename, parsed_doc.stats
+
+
+def test_parser_batch(directory: str):
+    """
+    Parseia todos os .htm de um diretório em paralelo (um processo por núcleo)
+
+    Args:
+        directory: Diretório com os arquivos HTML
+    """
+    files = sorted(glob.glob(os.path.join(directory, "*.htm")))
+
+    print(f"\n{BANNER}")
+    print(f"Testando parser com {len(files)} arquivos de: {directory}")
+    print(f"{BANNER}\n")
+
+    # Parsing é CPU-bound e independente por arquivo: processos contornam o GIL
+    with ProcessPoolExecutor() as executor:
+        results = list(executor.map(_parse_one, files, chunksize=4))
+
+    totals = {}
+    for filename, stats in results:
+        print(f"  {filename:<40} nos: {stats['total_nodes']:>6}  segmentos: {stats['text_segments']:>6}")
+        for key, value in stats.items():
+            totals[key] = totals.get(key, 0) + value
+
+    print("\nTOTAIS:")
+    for key, value in totals.items():
+        print(f"  - {key}: {value}")
+
+    print(f"\n{BANNER}")
+    print("TESTE CONCLUIDO COM SUCESSO!")
+    print(f"{BANNER}\n")
+
+    return results
+
+
 def test_with_sample_html():
     """Testa com HTML de exemplo"""
     sample_html = """
@@ -105,18 +153,19 @@ def test_with_sample_html():
     </html>
     """
 
-    print(f"\n{'='*80}")
+    print(f"\n{BANNER}")
     print("Testando parser com HTML de exemplo")
-    print(f"{'='*80}\n")
+    print(f"{BANNER}\n")
 
     parser = LatinGrammarParser()
     parsed_doc = parser.parse_html(sample_html, "sample.htm")
 
     print(f"[OK] Parsing concluido")
+    stats = parsed_doc.stats
     print(f"  - Nos: {len(parsed_doc.nodes)}")
-    print(f"  - Segmentos de texto: {parsed_doc.stats['text_segments']}")
-    print(f"  - Latim: {parsed_doc.stats['latin_segments']}")
-    print(f"  - Ingles: {parsed_doc.stats['english_segments']}")
+    print(f"  - Segmentos de texto: {stats['text_segments']}")
+    print(f"  - Latim: {stats['latin_segments']}")
+    print(f"  - Ingles: {stats['english_segments']}")
 
     # Mostrar estrutura
     print("\nESTRUTURA:")
@@ -131,12 +180,20 @@ def test_with_sample_html():
         for child in node.children:
             print(f"{indent}  +-- {child.node_type}")
 
-    print(f"\n{'='*80}")
+    print(f"\n{BANNER}")
     print("TESTE DE EXEMPLO CONCLUIDO!")
-    print(f"{'='*80}\n")
+    print(f"{BANNER}\n")
 
 
 if __name__ == "__main__":
+    quiet = "-q" in sys.argv or "--quiet" in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg not in ("-q", "--quiet")]
+
+    # Diretório como argumento: parsear todos os arquivos em paralelo
+    if args and os.path.isdir(args[0]):
+        test_parser_batch(args[0])
+        sys.exit(0)
+
     # Primeiro, teste com HTML de exemplo
     test_with_sample_html()
 
@@ -144,14 +201,13 @@ if __name__ == "__main__":
     resources_path = "../Resources"
     test_file = os.path.join(resources_path, "alphabet.htm")
 
-    if os.path.exists(test_file):
-        parsed = test_parser_with_file(test_file)
-
+    try:
+        parsed = test_parser_with_file(test_file, quiet=quiet)
+    except FileNotFoundError:
+        print(f"[AVISO] Arquivo nao encontrado: {test_file}")
+        print(f"        Para testar com arquivo real, ajuste o caminho em test_parser.py")
+    else:
         # Opcionalmente, salvar resultado em JSON
         output_file = "parsed_output.json"
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(parsed.model_dump(), f, indent=2, ensure_ascii=False)
+        Path(output_file).write_text(parsed.model_dump_json(indent=2), encoding='utf-8')
         print(f"[SAVED] Resultado salvo em: {output_file}")
-    else:
-        print(f"[AVISO] Arquivo nao encontrado: {test_file}")
-        print(f"        Para testar com arquivo real, ajuste o caminho em test_parser.py")
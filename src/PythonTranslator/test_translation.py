@@ -1,36 +1,66 @@
 """
 Script de teste para tradução com AI
 """
+import asyncio
 import os
 import sys
-import json
+from collections import deque
+from itertools import islice
+from pathlib import Path
+from typing import List, Union
+from pydantic import TypeAdapter
 from html_parser import LatinGrammarParser
-from translator_factory import TranslatorFactory
-from translation_strategy import SectionTranslator
+from logging_setup import setup_queue_logging
+from models import ParsedDocument
+from report_utils import buffered_report
 
 # Fix encoding para Windows
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8')
 
+# Separadores dos relatórios
+BANNER = "=" * 80
+RULE = "─" * 80
+
+# Serializador de listas de documentos (saída com vários arquivos)
+_DOCUMENTS_ADAPTER = TypeAdapter(List[ParsedDocument])
+
+# Logs do tradutor no console (via fila), junto com os prints do script
+setup_queue_logging(fmt="%(message)s", stream=sys.stdout)
+
 
 def test_translation(
-    html_file: str,
+    html_file: Union[str, List[str]],
     provider: str = "gemini",
     api_key: str = None,
-    output_file: str = None
+    output_file: str = None,
+    concurrency: int = 16,
+    use_cache: bool = True,
+    batch_size: int = 8,
+    quiet: bool = False
 ):
     """
-    Testa tradução de um arquivo HTML
+    Testa tradução de um ou mais arquivos HTML
+
+    Com vários arquivos, até `batch_size` documentos vão em uma mesma
+    chamada à IA e os lotes são traduzidos em paralelo (até `concurrency`
+    ao mesmo tempo).
 
     Args:
-        html_file: Caminho para arquivo HTML
+        html_file: Caminho (ou lista de caminhos) para arquivo HTML
         provider: Provedor de IA ('gemini' ou 'claude')
         api_key: Chave da API (usa variável de ambiente se None)
         output_file: Arquivo de saída (opcional)
+        concurrency: Máximo de lotes em tradução ao mesmo tempo
+        use_cache: Se True, reaproveita traduções do cache em disco (TRANSLATION_CACHE_DIR)
+        batch_size: Documentos unidos em uma mesma chamada à IA (1 = um por chamada)
+        quiet: Se True, não mostra exemplos de traduções
     """
-    print(f"\n{'='*80}")
+    html_files = [html_file] if isinstance(html_file, str) else list(html_file)
+
+    print(f"\n{BANNER}")
     print(f"TESTE DE TRADUÇÃO")
-    print(f"{'='*80}\n")
+    print(f"{BANNER}\n")
 
     # Verificar API key
     if not api_key:
@@ -42,42 +72,48 @@ def test_translation(
             print(f"       Ou passe como parâmetro: --api-key SUA_CHAVE")
             return
 
-    # Verificar arquivo
-    if not os.path.exists(html_file):
-        print(f"[ERRO] Arquivo não encontrado: {html_file}")
-        return
-
-    print(f"Arquivo: {html_file}")
+    print(f"Arquivo(s): {', '.join(html_files)}")
     print(f"Provedor: {provider}")
     print(f"API Key: {'*' * (len(api_key) - 4) + api_key[-4:]}\n")
 
     # Passo 1: Parsear HTML
-    print(f"{'─'*80}")
+    print(RULE)
     print(f"PASSO 1: Parseando HTML...")
-    print(f"{'─'*80}\n")
-
-    with open(html_file, 'r', encoding='utf-8') as f:
-        html_content = f.read()
+    print(f"{RULE}\n")
 
     parser = LatinGrammarParser()
-    parsed_doc = parser.parse_html(html_content, os.path.basename(html_file))
+    parsed_docs = []
+    for html_file in html_files:
+        try:
+            parsed_doc = parser.parse_html_cached(html_file)
+        except FileNotFoundError:
+            print(f"[ERRO] Arquivo não encontrado: {html_file}")
+            return
+        parsed_docs.append(parsed_doc)
+        stats = parsed_doc.stats
 
-    print(f"[OK] Documento parseado")
-    print(f"  - Título: {parsed_doc.title}")
-    print(f"  - Total de nós: {parsed_doc.stats['total_nodes']}")
-    print(f"  - Segmentos de texto: {parsed_doc.stats['text_segments']}")
-    print(f"  - Latim (preservar): {parsed_doc.stats['latin_segments']}")
-    print(f"  - Inglês (traduzir): {parsed_doc.stats['english_segments']}")
-    print(f"  - Gloss (traduzir): {parsed_doc.stats['gloss_segments']}\n")
+        print(f"[OK] Documento parseado: {parsed_doc.original_filename}")
+        print(f"  - Título: {parsed_doc.title}")
+        print(f"  - Total de nós: {stats['total_nodes']}")
+        print(f"  - Segmentos de texto: {stats['text_segments']}")
+        print(f"  - Latim (preservar): {stats['latin_segments']}")
+        print(f"  - Inglês (traduzir): {stats['english_segments']}")
+        print(f"  - Gloss (traduzir): {stats['gloss_segments']}\n")
 
     # Passo 2: Criar tradutor
-    print(f"{'─'*80}")
+    print(RULE)
     print(f"PASSO 2: Criando tradutor...")
-    print(f"{'─'*80}\n")
+    print(f"{RULE}\n")
 
+    # SDKs de IA só são importados depois de confirmar a API key (segundos de import)
+    from translator_factory import TranslatorFactory
+    from translation_strategy import SectionTranslator
+    from translation_cache import set_cache_enabled
+
+    set_cache_enabled(use_cache)
     try:
         strategy = TranslatorFactory.create(provider, api_key)
-        translator = SectionTranslator(strategy, max_retries=3)
+        translator = SectionTranslator(strategy, adaptive=True)
         print(f"[OK] Tradutor criado: {strategy.get_provider_name()}\n")
     except ValueError as e:
         print(f"[ERRO] {str(e)}")
@@ -87,81 +123,82 @@ def test_translation(
         return
 
     # Passo 3: Traduzir documento
-    print(f"{'─'*80}")
+    print(RULE)
     print(f"PASSO 3: Traduzindo documento...")
-    print(f"{'─'*80}\n")
+    print(f"{RULE}\n")
 
-    translated_doc = translator.translate_document(parsed_doc)
+    # Documentos pequenos agrupados em lotes por chamada; lotes sobrepostos
+    # (rede é o gargalo)
+    translated_docs = asyncio.run(_translate_batch(
+        translator, parsed_docs, batch_size=batch_size, max_concurrency=concurrency
+    ))
 
     # Passo 4: Mostrar exemplos
-    print(f"{'─'*80}")
+    print(RULE)
     print(f"PASSO 4: Verificando traduções...")
-    print(f"{'─'*80}\n")
+    print(f"{RULE}\n")
 
-    show_translation_samples(translated_doc, max_samples=5)
+    if not quiet:
+        for translated_doc in translated_docs:
+            show_translation_samples(translated_doc, max_samples=5)
 
     # Passo 5: Salvar resultado
     if output_file:
-        print(f"{'─'*80}")
+        print(RULE)
         print(f"PASSO 5: Salvando resultado...")
-        print(f"{'─'*80}\n")
+        print(f"{RULE}\n")
 
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(translated_doc.model_dump(), f, indent=2, ensure_ascii=False)
+        # Serialização em uma passada só (pydantic-core), sem dicts intermediários
+        if len(translated_docs) == 1:
+            Path(output_file).write_text(translated_docs[0].model_dump_json(indent=2), encoding='utf-8')
+        else:
+            Path(output_file).write_bytes(_DOCUMENTS_ADAPTER.dump_json(translated_docs, indent=2))
 
         print(f"[OK] Resultado salvo em: {output_file}\n")
 
-    print(f"{'='*80}")
+    print(BANNER)
     print(f"TESTE CONCLUÍDO COM SUCESSO!")
-    print(f"{'='*80}\n")
+    print(f"{BANNER}\n")
+
+
+async def _translate_batch(translator, parsed_docs: List[ParsedDocument], **kwargs) -> List[ParsedDocument]:
+    """Traduz os lotes e fecha os clientes assíncronos antes do loop acabar"""
+    async with translator:
+        return await translator.translate_batch_async(parsed_docs, **kwargs)
+
+
+def _iter_translatable(nodes):
+    """Segmentos em inglês/gloss da árvore, em pré-ordem (pilha explícita, sem recursão)"""
+    stack = deque(reversed(nodes))
+    while stack:
+        node = stack.pop()
+        for segment in node.text_segments:
+            if segment.text_type.value in ("english", "gloss"):
+                yield segment
+        stack.extend(reversed(node.children))
 
 
 def show_translation_samples(parsed_doc, max_samples=5):
     """Mostra exemplos de traduções"""
 
-    print("Exemplos de traduções:\n")
+    # Saída acumulada e escrita de uma vez
+    with buffered_report():
+        print("Exemplos de traduções:\n")
 
-    count = 0
-    for node in parsed_doc.nodes:
-        if count >= max_samples:
-            break
+        count = 0
+        for count, segment in enumerate(islice(_iter_translatable(parsed_doc.nodes), max_samples), 1):
+            print(f"[{count}] Tipo: {segment.text_type.value}")
+            print(f"    Texto: {segment.text[:100]}{'...' if len(segment.text) > 100 else ''}")
 
-        for segment in node.text_segments:
-            if count >= max_samples:
-                break
-
-            if segment.text_type.value in ["english", "gloss"]:
-                print(f"[{count + 1}] Tipo: {segment.text_type.value}")
-                print(f"    Texto: {segment.text[:100]}{'...' if len(segment.text) > 100 else ''}")
-
-                if segment.formatting.bold:
-                    print(f"    Formatação: NEGRITO")
-                if segment.formatting.italic:
-                    print(f"    Formatação: ITÁLICO")
-
-                print()
-                count += 1
-
-        # Verificar filhos recursivamente
-        def check_children(node):
-            nonlocal count
-            for child in node.children:
-                if count >= max_samples:
-                    return
-                for segment in child.text_segments:
-                    if count >= max_samples:
-                        return
-                    if segment.text_type.value in ["english", "gloss"]:
-                        print(f"[{count + 1}] Tipo: {segment.text_type.value}")
-                        print(f"    Texto: {segment.text[:100]}{'...' if len(segment.text) > 100 else ''}")
-                        print()
-                        count += 1
-                check_children(child)
-
-        check_children(node)
-
-    if count == 0:
-        print("[AVISO] Nenhum segmento traduzível encontrado")
+            if segment.formatting.bold:
+                print(f"    Formatação: NEGRITO")
+            if segment.formatting.italic:
+                print(f"    Formatação: ITÁLICO")
+
+            print()
+
+        if count == 0:
+            print("[AVISO] Nenhum segmento traduzível encontrado")
 
 
 def main():
@@ -171,9 +208,9 @@ def main():
     parser = argparse.ArgumentParser(description="Teste de tradução com AI")
     parser.add_argument(
         "html_file",
-        nargs="?",
-        default="../Resources/alphabet.htm",
-        help="Arquivo HTML para traduzir (padrão: alphabet.htm)"
+        nargs="*",
+        default=["../Resources/alphabet.htm"],
+        help="Arquivo(s) HTML para traduzir (padrão: alphabet.htm)"
     )
     parser.add_argument(
         "--provider",
@@ -189,6 +226,28 @@ def main():
         "--output",
         help="Arquivo de saída JSON (opcional)"
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=16,
+        help="Máximo de lotes traduzidos em paralelo (padrão: 16)"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=8,
+        help="Documentos por chamada à IA (padrão: 8, máximo: 16)"
+    )
+    parser.add_argument(
+        "-q", "--quiet",
+        action="store_true",
+        help="Não mostrar exemplos de traduções"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Não usar o cache de traduções em disco (TRANSLATION_CACHE_DIR)"
+    )
 
     args = parser.parse_args()
 
@@ -197,16 +256,20 @@ def main():
         html_file=args.html_file,
         provider=args.provider,
         api_key=args.api_key,
-        output_file=args.output
+        output_file=args.output,
+        concurrency=args.concurrency,
+        use_cache=not args.no_cache,
+        batch_size=args.batch_size,
+        quiet=args.quiet
     )
 
 
 if __name__ == "__main__":
     # Se não tiver argumentos, mostrar ajuda e usar padrões
     if len(sys.argv) == 1:
-        print("\n" + "="*80)
+        print("\n" + BANNER)
         print("TESTE DE TRADUÇÃO - Latin Grammar Translator")
-        print("="*80)
+        print(BANNER)
         print("\nModo de uso:")
         print("  python test_translation.py [arquivo.htm] --provider gemini --api-key SUA_CHAVE")
         print("\nOu defina variável de ambiente:")
@@ -214,7 +277,7 @@ if __name__ == "__main__":
         print("  Linux:   export GEMINI_API_KEY=sua_chave")
         print("\nDepois execute:")
         print("  python test_translation.py")
-        print("\n" + "="*80 + "\n")
+        print("\n" + BANNER + "\n")
 
         # Verificar se há API key em variável de ambiente
         if os.getenv("GEMINI_API_KEY"):
@@ -0,0 +1,100 @@
+"""
+Cache em disco das traduções por segmento
+
+Cada texto traduzido fica guardado (por modelo e glossário): uma seção já
+traduzida é resolvida inteira pelo cache e um documento editado só envia os
+textos novos.
+"""
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, Iterable
+
+try:
+    import diskcache
+except ImportError:  # Cache é opcional
+    diskcache = None
+
+
+# Diretório do cache (vazio desativa)
+TRANSLATION_CACHE_DIR = os.getenv("TRANSLATION_CACHE_DIR", ".translation_cache")
+
+_cache = None
+_cache_lock = threading.Lock()
+_enabled = True
+
+
+def get_translation_cache():
+    """
+    Retorna o cache de traduções compartilhado
+
+    Returns:
+        Instância de diskcache.Cache ou None se o cache estiver desativado
+    """
+    global _cache
+    if not _enabled:
+        return None
+    if _cache is None and diskcache is not None and TRANSLATION_CACHE_DIR:
+        with _cache_lock:
+            if _cache is None:
+                _cache = diskcache.Cache(TRANSLATION_CACHE_DIR)
+    return _cache
+
+
+def set_cache_enabled(enabled: bool):
+    """
+    Liga ou desliga o cache neste processo (ex: --no-cache dos scripts)
+
+    Args:
+        enabled: False faz leituras e gravações serem ignoradas
+    """
+    global _enabled
+    _enabled = enabled
+
+
+def glossary_digest(glossary: Dict[str, str]) -> str:
+    """Hash estável do conteúdo do glossário"""
+    raw = json.dumps(sorted(glossary.items()), ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def segment_cache_key(model_name: str, glossary_digest: str, text: str, seg_type: str) -> str:
+    """
+    Calcula a chave de cache de um segmento isolado
+
+    Args:
+        model_name: Modelo usado na tradução
+        glossary_digest: Hash do glossário usado no prompt
+        text: Texto original do segmento
+        seg_type: Tipo do segmento ("english", "gloss")
+
+    Returns:
+        "seg:" + hash SHA-256
+    """
+    raw = "\x00".join((model_name, glossary_digest, seg_type, text))
+    return "seg:" + hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def cache_get_many(keys: Iterable[str]) -> Dict[str, str]:
+    """Busca várias chaves de uma vez ({chave: valor} só das encontradas)"""
+    cache = get_translation_cache()
+    if cache is None:
+        return {}
+
+    found = {}
+    for key in keys:
+        value = cache.get(key)
+        if value is not None:
+            found[key] = value
+    return found
+
+
+def cache_set_many(items: Dict[str, str]):
+    """Grava vários pares em uma única transação (ignorado se cache desativado)"""
+    cache = get_translation_cache()
+    if cache is None or not items:
+        return
+    with cache.transact():
+        for key, value in items.items():
+            cache.set(key, value)
@@ -3,11 +3,46 @@ Strategy pattern para tradução por seção completa
 Cada arquivo HTML é traduzido como uma seção inteira para manter contexto
 """
 from abc import ABC, abstractmethod
-from typing import List, Dict, Optional
-from dataclasses import dataclass
-from models import ParsedDocument, ParsedNode, TextSegment, TextType
-from glossary import get_glossary, format_glossary_for_prompt
-import json
+import asyncio
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Dict, Optional, Tuple
+from dataclasses import dataclass, field, replace
+from models import FlatDocument, ParsedDocument, TextSegment, TextType
+from glossary import get_glossary, format_glossary_for_prompt, build_glossary_index, search_glossary
+from translation_cache import (
+    segment_cache_key, glossary_digest, cache_get_many, cache_set_many
+)
+from rate_limit import AdaptiveConcurrency, estimate_tokens, retry_after_seconds
+from parse_utils import StreamingTranslationParser
+import orjson
+
+logger = logging.getLogger(__name__)
+
+
+# Máximo de documentos unidos em um prompt por translate_batch
+MAX_BATCH_DOCUMENTS = 16
+
+# Teto estimado de tokens dos segmentos de um lote (o prefixo fixo é pago uma vez)
+MAX_BATCH_PROMPT_TOKENS = 6000
+
+# Modo adaptativo: esperas por limite de taxa por seção e teto de cada espera (s)
+MAX_RATE_LIMIT_WAITS = 8
+RATE_LIMIT_MAX_DELAY = 60.0
+
+# Novos pedidos só com os IDs que faltaram numa resposta incompleta (cortada)
+MAX_COMPLETION_ROUNDS = 2
+
+# Tipos de segmento enviados para tradução (latim é preservado)
+_TRANSLATABLE_TYPES = frozenset({TextType.ENGLISH, TextType.GLOSS})
+
+# Segmentos sem letras (vazios, números, pontuação) não precisam ir para a IA
+_NON_TRANSLATABLE = re.compile(r"[\d\s\W]*")
 
 
 @dataclass
@@ -20,6 +55,10 @@ class SectionData:
     latin_count: int
     english_count: int
     gloss_count: int
+    # Segmento do documento de cada seg_N (índice N), para aplicar as traduções
+    segment_refs: List[TextSegment] = field(default_factory=list)
+    # Chamado com (id, tradução) enquanto a resposta chega (None = só no final)
+    on_translation: Optional[Callable[[str, str], None]] = None
 
 
 @dataclass
@@ -30,20 +69,111 @@ class TranslationResult:
     error_message: Optional[str] = None
     tokens_used: Optional[int] = None
     provider: Optional[str] = None
+    rate_limited: bool = False  # Falha por limite de taxa (429)
+    retry_after: Optional[float] = None  # Segundos pedidos pelo provedor
+
+
+def merge_sections(sections: List[SectionData]) -> Tuple[SectionData, List[str]]:
+    """
+    Une várias seções em uma só, prefixando os IDs dos segmentos
+
+    Args:
+        sections: Seções a unir
+
+    Returns:
+        (seção combinada, prefixo usado para cada seção)
+    """
+    prefixes = [f"b{i}_" for i in range(len(sections))]
+    segments = []
+    for prefix, section in zip(prefixes, sections):
+        for seg in section.segments_to_translate:
+            merged = dict(seg)
+            merged["id"] = prefix + seg["id"]
+            segments.append(merged)
+
+    merged_section = SectionData(
+        title=" | ".join(s.title for s in sections),
+        filename=", ".join(s.filename for s in sections),
+        segments_to_translate=segments,
+        total_segments=sum(s.total_segments for s in sections),
+        latin_count=sum(s.latin_count for s in sections),
+        english_count=sum(s.english_count for s in sections),
+        gloss_count=sum(s.gloss_count for s in sections)
+    )
+    return merged_section, prefixes
+
+
+def split_translations(translations: Dict[str, str], prefixes: List[str]) -> List[Dict[str, str]]:
+    """
+    Separa as traduções de uma seção combinada de volta por seção original
+
+    Args:
+        translations: Traduções {id_prefixado: texto}
+        prefixes: Prefixos retornados por merge_sections
+
+    Returns:
+        Lista de dicionários {id_original: texto}, na ordem das seções
+    """
+    lookup = {prefix: i for i, prefix in enumerate(prefixes)}
+    parts: List[Dict[str, str]] = [{} for _ in prefixes]
+    for seg_id, text in translations.items():
+        prefix, sep, original_id = seg_id.partition("_")
+        index = lookup.get(prefix + sep)
+        if index is not None:
+            parts[index][original_id] = text
+    return parts
 
 
 class TranslationStrategy(ABC):
     """Interface abstrata para estratégias de tradução por seção"""
 
-    def __init__(self, api_key: str, glossary: Optional[Dict[str, str]] = None):
+    # Prefixo das mensagens de log do provedor (ex: "Claude")
+    log_label = "Tradutor"
+
+    # Exceções do SDK que indicam limite de taxa (429)
+    rate_limit_errors: Tuple[type, ...] = ()
+
+    def __init__(
+        self,
+        api_key: str,
+        glossary: Optional[Dict[str, str]] = None,
+        glossary_text: Optional[str] = None,
+        glossary_hash: Optional[str] = None,
+        structured_output: bool = False,
+        glossary_index: Optional[Dict[str, str]] = None
+    ):
+        """
+        Args:
+            api_key: Chave da API
+            glossary: Glossário customizado (usa padrão se None)
+            glossary_text: Glossário já formatado para o prompt (formata se None)
+            glossary_hash: Hash do glossário para as chaves de cache (calcula se None)
+            structured_output: Pede a resposta no schema nativo do provedor
+                (TranslationPayload) em vez de JSON livre no texto
+            glossary_index: Índice case-insensitive do glossário (monta se None)
+        """
         self.api_key = api_key
         self.glossary = glossary or get_glossary()
+        self.structured_output = structured_output
+        # Estatísticas são atualizadas por várias threads (pool do batcher,
+        # translate_documents_parallel, requisições Flask concorrentes)
+        self._stats_lock = threading.Lock()
         self.stats = {
             "sections_translated": 0,
             "segments_translated": 0,
             "total_tokens": 0,
             "errors": 0
         }
+        # Modo adaptativo: 429 sobem sem backoff interno (ver retry_on)
+        self.propagate_rate_limits = False
+        self._glossary_text = glossary_text or format_glossary_for_prompt(self.glossary)
+        self._glossary_digest: Optional[str] = glossary_hash
+        self.glossary_index = glossary_index or build_glossary_index(self.glossary)
+        self._prompt_prefix = self._build_static_prefix()
+
+    def enable_rate_limit_passthrough(self):
+        """Faz os erros de limite de taxa virarem resultado com falha na hora, sem backoff"""
+        self.propagate_rate_limits = True
 
     @abstractmethod
     def translate_section(self, section: SectionData) -> TranslationResult:
@@ -58,6 +188,22 @@ class TranslationStrategy(ABC):
         """
         pass
 
+    async def translate_section_async(self, section: SectionData) -> TranslationResult:
+        """
+        Versão assíncrona de translate_section
+
+        O padrão executa translate_section numa thread; provedores com SDK
+        assíncrono sobrescrevem este método.
+        """
+        return await asyncio.to_thread(self.translate_section, section)
+
+    async def aclose(self):
+        """
+        Fecha os recursos assíncronos do event loop atual (ex: pools HTTP)
+
+        Chamado por SectionTranslator.aclose(); o padrão não tem o que fechar.
+        """
+
     @abstractmethod
     def get_provider_name(self) -> str:
         """Retorna nome do provedor (ex: 'Gemini', 'Claude')"""
@@ -65,58 +211,288 @@ class TranslationStrategy(ABC):
 
     def get_stats(self) -> Dict:
         """Retorna estatísticas de uso"""
-        return self.stats.copy()
+        with self._stats_lock:
+            return self.stats.copy()
 
     def reset_stats(self):
         """Reseta estatísticas"""
-        self.stats = {
-            "sections_translated": 0,
-            "segments_translated": 0,
-            "total_tokens": 0,
-            "errors": 0
-        }
+        with self._stats_lock:
+            self.stats = {
+                "sections_translated": 0,
+                "segments_translated": 0,
+                "total_tokens": 0,
+                "errors": 0
+            }
+
+    def add_stats(self, **deltas: int):
+        """
+        Soma valores às estatísticas de uso (seguro entre threads)
+
+        Args:
+            **deltas: Incremento por chave (ex: sections_translated=1)
+        """
+        with self._stats_lock:
+            stats = self.stats
+            for key, value in deltas.items():
+                stats[key] += value
+
+    def _dedupe_section(
+        self,
+        section: SectionData
+    ) -> Tuple[SectionData, Dict[str, List[str]], Dict[str, str]]:
+        """
+        Remove segmentos repetidos antes de montar o prompt
+
+        Cabeçalhos de tabela e células de uma palavra se repetem muito; cada
+        texto (com o mesmo tipo) vai para a IA uma única vez.
+
+        Args:
+            section: Dados da seção
+
+        Returns:
+            (seção só com segmentos únicos,
+             {id representante: ids com o mesmo texto},
+             {id: texto} dos segmentos que não precisam de tradução)
+        """
+        value_to_ids: Dict[Tuple[str, str], List[str]] = {}
+        unique = []
+        skipped = {}
+
+        for seg in section.segments_to_translate:
+            if _NON_TRANSLATABLE.fullmatch(seg["text"]):
+                skipped[seg["id"]] = seg["text"]
+                continue
+
+            key = (seg["text"], seg["type"])
+            ids = value_to_ids.get(key)
+            if ids is None:
+                ids = value_to_ids[key] = []
+                unique.append(seg)
+            ids.append(seg["id"])
+
+        groups = {ids[0]: ids for ids in value_to_ids.values()}
+        return replace(section, segments_to_translate=unique), groups, skipped
+
+    def _expand_result(
+        self,
+        result: Optional[TranslationResult],
+        groups: Dict[str, List[str]],
+        skipped: Dict[str, str]
+    ) -> TranslationResult:
+        """
+        Replica as traduções dos segmentos únicos para todos os IDs repetidos
+
+        Args:
+            result: Resultado da seção reduzida (None se nada foi enviado)
+            groups: Grupos retornados por _dedupe_section
+            skipped: Segmentos mantidos sem tradução
+
+        Returns:
+            Resultado cobrindo todos os segmentos da seção original
+        """
+        if result is None:
+            return TranslationResult(
+                success=True,
+                translated_segments=dict(skipped),
+                tokens_used=0,
+                provider=self.get_provider_name()
+            )
+        if not result.success:
+            return result
+
+        expanded = dict(skipped)
+        for seg_id, text in result.translated_segments.items():
+            for same_id in groups.get(seg_id, (seg_id,)):
+                expanded[same_id] = text
+        return replace(result, translated_segments=expanded)
+
+    @staticmethod
+    def _stream_callback(
+        section: SectionData,
+        groups: Dict[str, List[str]]
+    ) -> Optional[Callable[[str, str], None]]:
+        """
+        Callback de streaming para o parser da resposta
+
+        Repassa cada tradução recebida a `section.on_translation` para todos
+        os IDs que compartilham o texto (grupos de _dedupe_section).
+
+        Args:
+            section: Seção enviada (já sem repetições)
+            groups: Grupos retornados por _dedupe_section
+
+        Returns:
+            Função (id, tradução) ou None se a seção não pediu streaming
+        """
+        callback = section.on_translation
+        if callback is None:
+            return None
+
+        def forward(seg_id: str, text: str):
+            for same_id in groups.get(seg_id, (seg_id,)):
+                callback(same_id, text)
+
+        return forward
+
+    def _run_section(self, section: SectionData, send) -> TranslationResult:
+        """
+        Fluxo comum dos provedores: remove repetições, envia e monta o resultado
+
+        Args:
+            section: Dados da seção
+            send: Envio do provedor (ex: _stream_response), chamado com
+                (prompt, IDs enviados, callback) e retornando (parser, uso de tokens)
+
+        Returns:
+            Resultado da tradução (exceções viram resultado com falha)
+        """
+        try:
+            # Textos repetidos vão uma única vez para a IA
+            section, groups, skipped = self._dedupe_section(section)
+            if not section.segments_to_translate:
+                return self._expand_result(None, groups, skipped)
+
+            parser, usage = send(*self._send_args(section, groups))
+            return self._expand_result(self._build_result(parser, usage), groups, skipped)
+
+        except Exception as e:
+            return self._error_result(e)
+
+    async def _run_section_async(self, section: SectionData, send) -> TranslationResult:
+        """Versão assíncrona de _run_section (`send` é a corrotina do provedor)"""
+        try:
+            section, groups, skipped = self._dedupe_section(section)
+            if not section.segments_to_translate:
+                return self._expand_result(None, groups, skipped)
+
+            parser, usage = await send(*self._send_args(section, groups))
+            return self._expand_result(self._build_result(parser, usage), groups, skipped)
+
+        except Exception as e:
+            return self._error_result(e)
+
+    def _send_args(
+        self,
+        section: SectionData,
+        groups: Dict[str, List[str]]
+    ) -> Tuple[str, List[str], Optional[Callable[[str, str], None]]]:
+        """Prompt, IDs enviados e callback de streaming da seção (já sem repetições)"""
+        prompt = self._create_section_prompt(section)
+
+        logger.debug(
+            "[%s] Enviando %d segmentos (prompt: ~%d caracteres)",
+            self.log_label, len(section.segments_to_translate), len(prompt)
+        )
+
+        ids = [seg["id"] for seg in section.segments_to_translate]
+        return prompt, ids, self._stream_callback(section, groups)
+
+    def _tokens_used(self, usage) -> Optional[int]:
+        """Total de tokens a partir do uso informado pelo provedor (None se desconhecido)"""
+        return None
+
+    def _build_result(self, parser: StreamingTranslationParser, usage) -> TranslationResult:
+        """Converte a resposta recebida em TranslationResult"""
+        tokens_used = self._tokens_used(usage)
+
+        # Traduções extraídas durante o streaming
+        translated_segments = parser.result()
+
+        if not translated_segments:
+            return TranslationResult(
+                success=False,
+                translated_segments={},
+                error_message="Falha ao parsear resposta JSON",
+                provider=self.get_provider_name()
+            )
+
+        if parser.complete:
+            logger.debug("[%s] Sucesso! %d segmentos traduzidos", self.log_label, len(translated_segments))
+        else:
+            # Resposta cortada: os IDs que faltam são pedidos de novo pelo
+            # SectionTranslator
+            logger.warning(
+                "[%s] Resposta incompleta: %d de %d segmentos%s",
+                self.log_label, len(translated_segments), len(parser.expected),
+                " (limite de tokens)" if parser.truncated else ""
+            )
+
+        return TranslationResult(
+            success=True,
+            translated_segments=translated_segments,
+            tokens_used=tokens_used,
+            provider=self.get_provider_name()
+        )
+
+    def _error_result(self, error: Exception) -> TranslationResult:
+        """TranslationResult de falha a partir de uma exceção"""
+        error_msg = f"Erro no {self.log_label}: {str(error)}"
+        logger.error(error_msg)
+
+        return TranslationResult(
+            success=False,
+            translated_segments={},
+            error_message=error_msg,
+            provider=self.get_provider_name(),
+            rate_limited=isinstance(error, self.rate_limit_errors),
+            retry_after=retry_after_seconds(error)
+        )
+
+    def search_term(self, term: str) -> str:
+        """Tradução do termo pelo glossário desta estratégia (índice já montado)"""
+        return search_glossary(term, self.glossary, self.glossary_index)
+
+    def glossary_hash(self) -> str:
+        """Hash do glossário usado nas chaves de cache (calculado uma vez)"""
+        if self._glossary_digest is None:
+            self._glossary_digest = glossary_digest(self.glossary)
+        return self._glossary_digest
 
     def _create_section_prompt(self, section: SectionData) -> str:
         """
         Cria prompt para traduzir seção completa
 
+        Instruções, glossário e formato de resposta vêm prontos do prefixo
+        estático; só as informações e os segmentos da seção são montados aqui,
+        sem linhas decorativas (essa parte é paga a cada chamada).
+
         Args:
             section: Dados da seção
 
         Returns:
             Prompt formatado
         """
-        glossary_text = format_glossary_for_prompt(self.glossary)
+        return f"""{self._prompt_prefix}
 
-        # Montar lista de segmentos em formato estruturado
-        segments_json = []
-        for seg in section.segments_to_translate:
-            segments_json.append({
-                "id": seg["id"],
-                "text": seg["text"],
-                "type": seg["type"]
-            })
+## INFORMAÇÕES DA SEÇÃO
+Título: {section.title}
+Arquivo: {section.filename}
+Total de segmentos para traduzir: {len(section.segments_to_translate)}
+
+## SEGMENTOS PARA TRADUZIR (um objeto JSON por linha)
+{self._format_segments(section)}
+
+IMPORTANTE: Retorne APENAS o JSON, sem texto adicional antes ou depois.
+"""
 
-        segments_text = json.dumps(segments_json, indent=2, ensure_ascii=False)
+    def _build_static_prefix(self) -> str:
+        """
+        Parte do prompt que não depende da seção (calculada uma vez por tradutor)
 
-        prompt = f"""Você é um tradutor especializado em textos acadêmicos de gramática latina do livro "New Latin Grammar" de Allen & Greenough.
+        Returns:
+            Instruções, glossário, regras e formato de resposta
+        """
+        return f"""Você é um tradutor especializado em textos acadêmicos de gramática latina do livro "New Latin Grammar" de Allen & Greenough.
 
 Sua tarefa é traduzir uma seção completa do inglês para português brasileiro, mantendo:
 - Precisão terminológica
 - Tom acadêmico e formal
 - Consistência ao longo da seção
 
-═══════════════════════════════════════════════════════════════════════
-INFORMAÇÕES DA SEÇÃO:
-═══════════════════════════════════════════════════════════════════════
-Título: {section.title}
-Arquivo: {section.filename}
-Total de segmentos para traduzir: {len(section.segments_to_translate)}
-
 ═══════════════════════════════════════════════════════════════════════
 GLOSSÁRIO DE TERMOS TÉCNICOS (use SEMPRE que aplicável):
 ═══════════════════════════════════════════════════════════════════════
-{glossary_text}
+{self._glossary_text}
 
 ═══════════════════════════════════════════════════════════════════════
 REGRAS CRÍTICAS:
@@ -129,29 +505,30 @@ REGRAS CRÍTICAS:
 6. Se um segmento for tipo "english", traduza mantendo tom explicativo acadêmico
 7. Retorne EXATAMENTE no formato JSON especificado abaixo
 
-═══════════════════════════════════════════════════════════════════════
-SEGMENTOS PARA TRADUZIR:
-═══════════════════════════════════════════════════════════════════════
-{segments_text}
-
 ═══════════════════════════════════════════════════════════════════════
 FORMATO DE RESPOSTA OBRIGATÓRIO:
 ═══════════════════════════════════════════════════════════════════════
-Retorne um objeto JSON com a seguinte estrutura:
-{{
-  "translations": [
-    {{
-      "id": "id_do_segmento",
-      "translated": "texto traduzido aqui"
-    }},
-    ...
-  ]
-}}
+{self._response_format()}"""
 
-IMPORTANTE: Retorne APENAS o JSON, sem texto adicional antes ou depois.
-"""
+    def _response_format(self) -> str:
+        """Instrução do formato de resposta (schema nativo ou JSON compacto no texto)"""
+        if self.structured_output:
+            return (
+                "Retorne uma tradução por segmento no formato estruturado:\n"
+                '{"translations": [{"id": "id_do_segmento", "translated": "texto traduzido aqui"}, ...]}'
+            )
+        return (
+            'Retorne um objeto JSON com a chave "t" contendo pares [id, tradução]:\n'
+            '{"t": [["id_do_segmento", "texto traduzido aqui"], ...]}'
+        )
 
-        return prompt
+    @staticmethod
+    def _format_segments(section: SectionData) -> str:
+        """Um objeto JSON compacto por segmento ({id, text, type})"""
+        return "\n".join(
+            orjson.dumps({"id": seg["id"], "text": seg["text"], "type": seg["type"]}).decode()
+            for seg in section.segments_to_translate
+        )
 
 
 class SectionTranslator:
@@ -159,9 +536,41 @@ class SectionTranslator:
     Orquestrador que traduz documentos por seção completa
     """
 
-    def __init__(self, strategy: TranslationStrategy, max_retries: int = 3):
+    def __init__(self, strategy: TranslationStrategy, max_retries: int = 3, adaptive: bool = False):
+        """
+        Args:
+            strategy: Estratégia de tradução (provedor de IA)
+            max_retries: Tentativas por seção (erros de limite de taxa não
+                contam no modo adaptativo)
+            adaptive: Ajusta a concorrência com AIMD e espera o `retry-after`
+                do provedor em vez de gastar tentativas
+        """
         self.strategy = strategy
         self.max_retries = max_retries
+        self.adaptive = adaptive
+        self.concurrency = AdaptiveConcurrency() if adaptive else None
+        if adaptive:
+            # Sem isso o 429 é reprocessado dentro da chamada ao provedor e o
+            # AIMD só fica sabendo depois de todas as esperas
+            strategy.enable_rate_limit_passthrough()
+        # (texto, tipo) -> tradução já obtida, reaproveitada entre documentos
+        self._known: Dict[Tuple[str, str], str] = {}
+
+    async def aclose(self):
+        """
+        Fecha os clientes assíncronos da estratégia no event loop atual
+
+        Chame antes do fim da corrotina passada a asyncio.run (ou use
+        `async with translator:`): cada loop tem os próprios clientes, e os
+        que não são fechados deixam sockets abertos para o GC.
+        """
+        await self.strategy.aclose()
+
+    async def __aenter__(self) -> "SectionTranslator":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
 
     def translate_document(self, parsed_doc: ParsedDocument) -> ParsedDocument:
         """
@@ -173,168 +582,597 @@ class SectionTranslator:
         Returns:
             Documento traduzido
         """
-        print(f"\n{'='*80}")
-        print(f"TRADUÇÃO POR SEÇÃO COMPLETA")
-        print(f"Provedor: {self.strategy.get_provider_name()}")
-        print(f"Arquivo: {parsed_doc.original_filename}")
-        print(f"{'='*80}\n")
+        section = self._begin_document(parsed_doc)
+
+        # Traduzir seção completa
+        result = self._translate_with_retry(section)
+
+        return self._finish_document(parsed_doc, section, result)
+
+    async def translate_document_async(self, parsed_doc: ParsedDocument) -> ParsedDocument:
+        """
+        Traduz documento completo sem bloquear o event loop
+
+        Args:
+            parsed_doc: Documento parseado
+
+        Returns:
+            Documento traduzido
+        """
+        section = self._begin_document(parsed_doc)
+        result = await self._translate_with_retry_async(section)
+        return self._finish_document(parsed_doc, section, result)
+
+    async def translate_documents_async(
+        self,
+        parsed_docs: List[ParsedDocument],
+        max_concurrency: int = 5
+    ) -> List[ParsedDocument]:
+        """
+        Traduz vários documentos em paralelo
+
+        Cada documento continua sendo uma seção completa (uma chamada à IA);
+        as chamadas são sobrepostas, limitadas por um semáforo para não
+        estourar o limite de requisições do provedor. No modo adaptativo o
+        limite começa menor e é ajustado por AIMD.
+
+        Args:
+            parsed_docs: Documentos parseados
+            max_concurrency: Máximo de seções em tradução ao mesmo tempo
+
+        Returns:
+            Documentos traduzidos, na mesma ordem
+        """
+        semaphore = self._concurrency_gate(max_concurrency)
+
+        async def translate_one(parsed_doc: ParsedDocument) -> ParsedDocument:
+            async with semaphore:
+                return await self.translate_document_async(parsed_doc)
+
+        return list(await asyncio.gather(*(translate_one(doc) for doc in parsed_docs)))
+
+    def translate_documents_parallel(
+        self,
+        parsed_docs: List[ParsedDocument],
+        max_workers: int = 16
+    ) -> List[ParsedDocument]:
+        """
+        Traduz vários documentos em threads, para quem não roda um event loop
+
+        Os SDKs liberam o GIL durante o HTTP, então as chamadas se sobrepõem;
+        o rate limiter por provedor continua valendo entre as threads e, no
+        modo adaptativo, um 429 espera o `retry-after` dentro da própria thread.
+
+        Args:
+            parsed_docs: Documentos parseados
+            max_workers: Máximo de seções em tradução ao mesmo tempo
+
+        Returns:
+            Documentos traduzidos, na mesma ordem
+        """
+        if len(parsed_docs) <= 1:
+            return [self.translate_document(doc) for doc in parsed_docs]
+
+        workers = min(max_workers, len(parsed_docs))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="translate") as executor:
+            return list(executor.map(self.translate_document, parsed_docs))
+
+    def translate_batch(
+        self,
+        parsed_docs: List[ParsedDocument],
+        batch_size: int = 8,
+        max_prompt_tokens: int = MAX_BATCH_PROMPT_TOKENS
+    ) -> List[ParsedDocument]:
+        """
+        Traduz documentos pequenos agrupados: até `batch_size` por chamada à IA
+
+        As seções dos documentos de cada lote são unidas em um só prompt
+        (IDs prefixados por documento) e a resposta é redistribuída. Menos
+        requisições dentro do limite de RPM e o prefixo fixo (instruções +
+        glossário) é pago uma vez por lote.
+
+        Args:
+            parsed_docs: Documentos parseados
+            batch_size: Documentos por chamada (limitado a MAX_BATCH_DOCUMENTS)
+            max_prompt_tokens: Tokens estimados dos segmentos por chamada
+
+        Returns:
+            Documentos traduzidos, na mesma ordem
+        """
+        translated = []
+        for batch, sections in self._pack_sections(parsed_docs, batch_size, max_prompt_tokens):
+            section, prefixes = self._merge_batch(sections)
+            result = self._translate_with_retry(section)
+            translated.extend(self._finish_batch(batch, sections, prefixes, result))
+        return translated
+
+    async def translate_batch_async(
+        self,
+        parsed_docs: List[ParsedDocument],
+        batch_size: int = 8,
+        max_concurrency: int = 5,
+        max_prompt_tokens: int = MAX_BATCH_PROMPT_TOKENS
+    ) -> List[ParsedDocument]:
+        """
+        Versão assíncrona de translate_batch, com lotes em paralelo
+
+        Args:
+            parsed_docs: Documentos parseados
+            batch_size: Documentos por chamada (limitado a MAX_BATCH_DOCUMENTS)
+            max_concurrency: Máximo de lotes em tradução ao mesmo tempo
+            max_prompt_tokens: Tokens estimados dos segmentos por chamada
+
+        Returns:
+            Documentos traduzidos, na mesma ordem
+        """
+        semaphore = self._concurrency_gate(max_concurrency)
+
+        async def translate_one(
+            batch: List[ParsedDocument],
+            sections: List[SectionData]
+        ) -> List[ParsedDocument]:
+            async with semaphore:
+                section, prefixes = self._merge_batch(sections)
+                result = await self._translate_with_retry_async(section)
+                return self._finish_batch(batch, sections, prefixes, result)
 
+        packed = self._pack_sections(parsed_docs, batch_size, max_prompt_tokens)
+        batches = await asyncio.gather(
+            *(translate_one(batch, sections) for batch, sections in packed)
+        )
+        return [doc for batch in batches for doc in batch]
+
+    def _concurrency_gate(self, max_concurrency: int):
+        """Semáforo fixo ou, no modo adaptativo, o limite AIMD (até `max_concurrency`)"""
+        if self.concurrency is None:
+            return asyncio.Semaphore(max_concurrency)
+        self.concurrency.maximum = max_concurrency
+        self.concurrency.limit = min(self.concurrency.limit, max_concurrency)
+        return self.concurrency
+
+    def _pack_sections(
+        self,
+        parsed_docs: List[ParsedDocument],
+        batch_size: int,
+        max_prompt_tokens: int
+    ) -> List[Tuple[List[ParsedDocument], List[SectionData]]]:
+        """
+        Extrai as seções e agrupa os documentos em lotes, em ordem
+
+        Cada lote recebe documentos até `batch_size` (ganho cai acima de ~16
+        por prompt) ou até a estimativa de tokens dos segmentos passar de
+        `max_prompt_tokens`. Um documento maior que o limite vai sozinho.
+
+        Args:
+            parsed_docs: Documentos parseados
+            batch_size: Documentos por lote (limitado a MAX_BATCH_DOCUMENTS)
+            max_prompt_tokens: Tokens estimados dos segmentos por lote
+
+        Returns:
+            Lista de (documentos do lote, seções correspondentes)
+        """
+        size = max(1, min(batch_size, MAX_BATCH_DOCUMENTS))
+        packed = []
+        docs: List[ParsedDocument] = []
+        sections: List[SectionData] = []
+        tokens = 0
+
+        for doc in parsed_docs:
+            section = self._begin_document(doc)
+            cost = sum(estimate_tokens(seg["text"]) for seg in section.segments_to_translate)
+            if docs and (len(docs) >= size or tokens + cost > max_prompt_tokens):
+                packed.append((docs, sections))
+                docs, sections, tokens = [], [], 0
+            docs.append(doc)
+            sections.append(section)
+            tokens += cost
+
+        if docs:
+            packed.append((docs, sections))
+        return packed
+
+    def _merge_batch(self, sections: List[SectionData]) -> Tuple[SectionData, Optional[List[str]]]:
+        """Une as seções do lote em uma só (sem prefixos se o lote tiver um documento)"""
+        if len(sections) == 1:
+            return sections[0], None
+        return merge_sections(sections)
+
+    def _finish_batch(
+        self,
+        batch: List[ParsedDocument],
+        sections: List[SectionData],
+        prefixes: Optional[List[str]],
+        result: TranslationResult
+    ) -> List[ParsedDocument]:
+        """Redistribui o resultado do lote e aplica em cada documento"""
+        if prefixes is None or not result.success:
+            return [
+                self._finish_document(doc, section, result)
+                for doc, section in zip(batch, sections)
+            ]
+
+        parts = split_translations(result.translated_segments, prefixes)
+        total = sum(len(s.segments_to_translate) for s in sections) or 1
+        finished = []
+        for doc, section, translations in zip(batch, sections, parts):
+            tokens = None
+            if result.tokens_used:
+                tokens = int(result.tokens_used * len(section.segments_to_translate) / total)
+            finished.append(self._finish_document(doc, section, replace(
+                result, translated_segments=translations, tokens_used=tokens
+            )))
+        return finished
+
+    def _begin_document(self, parsed_doc: ParsedDocument) -> SectionData:
+        """Extrai a seção a traduzir (detalhes só em nível DEBUG)"""
         # Extrair todos os segmentos que precisam tradução
         section = self._extract_section_data(parsed_doc)
+        section.on_translation = self._segment_setter(section)
 
-        print(f"Seção: {section.title}")
-        print(f"  - Total de segmentos: {section.total_segments}")
-        print(f"  - Latim (preservar): {section.latin_count}")
-        print(f"  - Inglês (traduzir): {section.english_count}")
-        print(f"  - Gloss (traduzir): {section.gloss_count}")
-        print(f"  - Para traduzir: {len(section.segments_to_translate)}\n")
+        logger.debug(
+            "Seção: %s | segmentos: %d | latim (preservar): %d | inglês: %d | gloss: %d | para traduzir: %d",
+            section.title, section.total_segments, section.latin_count,
+            section.english_count, section.gloss_count, len(section.segments_to_translate)
+        )
 
-        # Traduzir seção completa
-        result = self._translate_with_retry(section)
+        return section
 
+    def _finish_document(
+        self,
+        parsed_doc: ParsedDocument,
+        section: SectionData,
+        result: TranslationResult
+    ) -> ParsedDocument:
+        """Aplica o resultado ao documento (via segmentos da seção) e registra um resumo"""
         if result.success:
             # Aplicar traduções de volta ao documento
-            self._apply_translations(parsed_doc, result.translated_segments)
+            self._apply_translations(section, result.translated_segments)
 
-            print(f"[OK] Seção traduzida com sucesso!")
-            print(f"  - Segmentos traduzidos: {len(result.translated_segments)}")
-            if result.tokens_used:
-                print(f"  - Tokens usados: {result.tokens_used}")
+            # Um único registro por documento (workers em paralelo não intercalam linhas)
+            logger.info(
+                "[OK] %s | %s | segmentos: %d traduzidos de %d (latim preservado: %d) | tokens: %s",
+                section.filename, self.strategy.get_provider_name(),
+                len(result.translated_segments), section.total_segments,
+                section.latin_count, result.tokens_used
+            )
         else:
-            print(f"[ERRO] Falha na tradução: {result.error_message}")
+            logger.error("Falha na tradução de %s: %s", section.filename, result.error_message)
 
-        # Estatísticas finais
         stats = self.strategy.get_stats()
-        print(f"\n{'='*80}")
-        print(f"ESTATÍSTICAS:")
-        print(f"  - Seções traduzidas: {stats['sections_translated']}")
-        print(f"  - Segmentos traduzidos: {stats['segments_translated']}")
-        print(f"  - Tokens totais: {stats['total_tokens']}")
-        print(f"  - Erros: {stats['errors']}")
-        print(f"{'='*80}\n")
+        logger.debug(
+            "ESTATÍSTICAS: seções traduzidas: %d | segmentos traduzidos: %d | tokens totais: %d | erros: %d",
+            stats['sections_translated'], stats['segments_translated'],
+            stats['total_tokens'], stats['errors']
+        )
 
         return parsed_doc
 
     def _extract_section_data(self, parsed_doc: ParsedDocument) -> SectionData:
-        """Extrai dados da seção para tradução"""
-
-        segments_to_translate = []
-        segment_id = 0
-        latin_count = 0
-        english_count = 0
-        gloss_count = 0
-
-        def extract_recursive(node: ParsedNode):
-            nonlocal segment_id, latin_count, english_count, gloss_count
-
-            for segment in node.text_segments:
-                if segment.text_type == TextType.LATIN:
-                    latin_count += 1
-                elif segment.text_type == TextType.ENGLISH:
-                    english_count += 1
-                    segments_to_translate.append({
-                        "id": f"seg_{segment_id}",
-                        "text": segment.text,
-                        "type": "english",
-                        "segment_ref": segment  # Guardar referência
-                    })
-                    segment_id += 1
-                elif segment.text_type == TextType.GLOSS:
-                    gloss_count += 1
-                    segments_to_translate.append({
-                        "id": f"seg_{segment_id}",
-                        "text": segment.text,
-                        "type": "gloss",
-                        "segment_ref": segment
-                    })
-                    segment_id += 1
-
-            for child in node.children:
-                extract_recursive(child)
-
-        for node in parsed_doc.nodes:
-            extract_recursive(node)
+        """
+        Extrai dados da seção para tradução
+
+        O documento é achatado uma vez (pré-ordem, mesma ordem dos IDs seg_N)
+        e a classificação vira um laço linear sobre os segmentos.
+        """
+        flat = FlatDocument.from_document(parsed_doc)
+        counts = Counter(flat.segment_types)
+        translatable = _TRANSLATABLE_TYPES
+
+        segment_refs = [
+            segment
+            for segment, text_type in zip(flat.segments, flat.segment_types)
+            if text_type in translatable
+        ]
+        segments_to_translate = [
+            {"id": f"seg_{index}", "text": segment.text, "type": segment.text_type.value}
+            for index, segment in enumerate(segment_refs)
+        ]
 
         return SectionData(
             title=parsed_doc.title,
             filename=parsed_doc.original_filename or "unknown",
             segments_to_translate=segments_to_translate,
-            total_segments=segment_id + latin_count,
-            latin_count=latin_count,
-            english_count=english_count,
-            gloss_count=gloss_count
+            total_segments=len(segment_refs) + counts[TextType.LATIN],
+            latin_count=counts[TextType.LATIN],
+            english_count=counts[TextType.ENGLISH],
+            gloss_count=counts[TextType.GLOSS],
+            segment_refs=segment_refs
         )
 
     def _translate_with_retry(self, section: SectionData) -> TranslationResult:
-        """Traduz com retry em caso de erro"""
+        """Traduz com retry, enviando só textos ainda não traduzidos"""
+        section, known = self._reuse_known(section)
+        if known and not section.segments_to_translate:
+            return self._known_result(known)
+        result = self._call_with_retry(section)
+        for _ in range(MAX_COMPLETION_ROUNDS):
+            missing = self._missing_section(section, result)
+            if missing is None:
+                break
+            result = self._merge_completion(result, self._call_with_retry(missing))
+        return self._remember(section, result, known)
+
+    async def _translate_with_retry_async(self, section: SectionData) -> TranslationResult:
+        """Versão assíncrona de _translate_with_retry"""
+        section, known = self._reuse_known(section)
+        if known and not section.segments_to_translate:
+            return self._known_result(known)
+        result = await self._call_with_retry_async(section)
+        for _ in range(MAX_COMPLETION_ROUNDS):
+            missing = self._missing_section(section, result)
+            if missing is None:
+                break
+            result = self._merge_completion(result, await self._call_with_retry_async(missing))
+        return self._remember(section, result, known)
 
-        for attempt in range(self.max_retries):
+    @staticmethod
+    def _missing_section(section: SectionData, result: TranslationResult) -> Optional[SectionData]:
+        """
+        Seção só com os segmentos que faltaram numa resposta bem-sucedida
+
+        Respostas cortadas (ex: limite de tokens de saída) trazem parte dos
+        IDs; em vez de repetir a seção inteira, só o que falta é pedido.
+
+        Returns:
+            Seção com os segmentos pendentes ou None se nada falta (ou falhou)
+        """
+        if not result.success:
+            return None
+        translated = result.translated_segments
+        missing = [seg for seg in section.segments_to_translate if seg["id"] not in translated]
+        if not missing:
+            return None
+        logger.warning(
+            "[Completar] %d de %d segmentos sem tradução, pedindo só os que faltam",
+            len(missing), len(section.segments_to_translate)
+        )
+        return replace(section, segments_to_translate=missing)
+
+    @staticmethod
+    def _merge_completion(result: TranslationResult, extra: TranslationResult) -> TranslationResult:
+        """Junta as traduções de um pedido complementar ao resultado original"""
+        if not extra.success:
+            return result
+        return replace(
+            result,
+            translated_segments={**result.translated_segments, **extra.translated_segments},
+            tokens_used=(result.tokens_used or 0) + (extra.tokens_used or 0)
+        )
+
+    def _reuse_known(self, section: SectionData) -> Tuple[SectionData, Dict[str, str]]:
+        """
+        Separa os segmentos cujo texto já foi traduzido por este tradutor
+
+        Rótulos ("a.", "Note.") e glosas de uma palavra se repetem entre
+        documentos; a seção enviada à IA fica só com textos novos. Textos
+        que não estão na memória são procurados no cache em disco por
+        segmento (traduções de execuções anteriores).
+
+        Args:
+            section: Dados da seção
+
+        Returns:
+            (seção com os segmentos pendentes, {id: tradução já conhecida})
+        """
+        known = {}
+        pending = []
+        for seg in section.segments_to_translate:
+            text = self._known.get((seg["text"], seg["type"]))
+            if text is None:
+                pending.append(seg)
+            else:
+                known[seg["id"]] = text
+
+        if pending:
+            pending = self._reuse_cached_segments(pending, known)
+
+        if not known:
+            return section, known
+        logger.debug("[Dedupe] %d segmentos reaproveitados de traduções anteriores", len(known))
+        return replace(section, segments_to_translate=pending), known
+
+    def _reuse_cached_segments(self, pending: List[Dict], known: Dict[str, str]) -> List[Dict]:
+        """
+        Completa `known` com traduções do cache em disco por segmento
+
+        Args:
+            pending: Segmentos ainda sem tradução conhecida
+            known: {id: tradução} a completar
+
+        Returns:
+            Segmentos que continuam pendentes
+        """
+        keyed = [(self._segment_key(seg), seg) for seg in pending]
+        found = cache_get_many({key for key, _ in keyed})
+        if not found:
+            return pending
+
+        still_pending = []
+        for key, seg in keyed:
+            text = found.get(key)
+            if text is None:
+                still_pending.append(seg)
+            else:
+                known[seg["id"]] = text
+                self._known[(seg["text"], seg["type"])] = text
+        return still_pending
+
+    def _segment_key(self, seg: Dict) -> str:
+        """Chave do cache em disco de um segmento (provedor + modelo + glossário + texto)"""
+        return segment_cache_key(
+            self.strategy.get_provider_name(), self.strategy.glossary_hash(), seg["text"], seg["type"]
+        )
+
+    def _remember(
+        self,
+        section: SectionData,
+        result: TranslationResult,
+        known: Dict[str, str]
+    ) -> TranslationResult:
+        """Guarda as traduções novas e junta as já conhecidas ao resultado"""
+        if not result.success:
+            return result
+
+        by_id = {seg["id"]: seg for seg in section.segments_to_translate}
+        to_store = {}
+        for seg_id, text in result.translated_segments.items():
+            seg = by_id.get(seg_id)
+            if seg is not None:
+                self._known[(seg["text"], seg["type"])] = text
+                to_store[self._segment_key(seg)] = text
+        cache_set_many(to_store)
+
+        if not known:
+            return result
+        return replace(result, translated_segments={**known, **result.translated_segments})
+
+    def _known_result(self, known: Dict[str, str]) -> TranslationResult:
+        """Resultado de uma seção resolvida só com traduções já conhecidas"""
+        logger.debug("[Dedupe] Seção resolvida sem chamada à IA")
+        return TranslationResult(
+            success=True,
+            translated_segments=known,
+            tokens_used=0,
+            provider=self.strategy.get_provider_name()
+        )
+
+    def _call_with_retry(self, section: SectionData) -> TranslationResult:
+        """Chama a estratégia com retry em caso de erro"""
+
+        attempt = 0
+        waits = 0
+        while attempt < self.max_retries:
             try:
-                print(f"[Tentativa {attempt + 1}/{self.max_retries}] Enviando seção para tradução...")
+                logger.debug("[Tentativa %d/%d] Enviando seção para tradução...", attempt + 1, self.max_retries)
 
                 result = self.strategy.translate_section(section)
 
                 if result.success:
-                    self.strategy.stats['sections_translated'] += 1
-                    self.strategy.stats['segments_translated'] += len(result.translated_segments)
-                    if result.tokens_used:
-                        self.strategy.stats['total_tokens'] += result.tokens_used
-                    return result
-                else:
-                    print(f"[AVISO] Tentativa {attempt + 1} retornou erro: {result.error_message}")
-                    if attempt < self.max_retries - 1:
-                        print(f"[RETRY] Tentando novamente...")
-                        continue
+                    return self._record_success(result)
+
+                delay = self._rate_limit_delay(result, waits)
+                if delay is not None:
+                    waits += 1
+                    time.sleep(delay)
+                    continue
+                self._report_failed_attempt(attempt, result.error_message)
 
             except Exception as e:
-                print(f"[ERRO] Tentativa {attempt + 1} falhou com exceção: {str(e)}")
-                if attempt < self.max_retries - 1:
-                    print(f"[RETRY] Tentando novamente...")
+                self._report_failed_attempt(attempt, exception=e)
+            attempt += 1
+
+        return self._record_failure()
+
+    async def _call_with_retry_async(self, section: SectionData) -> TranslationResult:
+        """Versão assíncrona de _call_with_retry"""
+
+        attempt = 0
+        waits = 0
+        while attempt < self.max_retries:
+            try:
+                logger.debug("[Tentativa %d/%d] Enviando seção para tradução...", attempt + 1, self.max_retries)
+
+                result = await self.strategy.translate_section_async(section)
+
+                if result.success:
+                    return self._record_success(result)
+
+                delay = self._rate_limit_delay(result, waits)
+                if delay is not None:
+                    waits += 1
+                    await asyncio.sleep(delay)
                     continue
+                self._report_failed_attempt(attempt, result.error_message)
+
+            except Exception as e:
+                self._report_failed_attempt(attempt, exception=e)
+            attempt += 1
+
+        return self._record_failure()
+
+    def _record_success(self, result: TranslationResult) -> TranslationResult:
+        """Atualiza estatísticas da estratégia após uma tradução bem-sucedida"""
+        self.strategy.add_stats(
+            sections_translated=1,
+            segments_translated=len(result.translated_segments),
+            total_tokens=result.tokens_used or 0
+        )
+        if self.concurrency is not None:
+            self.concurrency.on_success()
+        return result
+
+    def _rate_limit_delay(self, result: TranslationResult, waits: int) -> Optional[float]:
+        """
+        Espera antes de repetir uma falha por limite de taxa (modo adaptativo)
 
-        # Todas as tentativas falharam
-        self.strategy.stats['errors'] += 1
+        Args:
+            result: Resultado com falha
+            waits: Esperas por limite de taxa já feitas nesta seção
+
+        Returns:
+            Segundos a esperar (sem gastar tentativa) ou None para tratar
+            como falha comum
+        """
+        if self.concurrency is None or not result.rate_limited or waits >= MAX_RATE_LIMIT_WAITS:
+            return None
+
+        self.concurrency.on_rate_limited()
+        if result.retry_after is not None:
+            delay = min(result.retry_after, RATE_LIMIT_MAX_DELAY)
+        else:
+            delay = random.uniform(0, min(RATE_LIMIT_MAX_DELAY, 2 ** waits))
+        logger.warning("[AIMD] Limite de taxa, aguardando %.1fs (sem gastar tentativa)", delay)
+        return delay
+
+    def _report_failed_attempt(
+        self,
+        attempt: int,
+        error_message: Optional[str] = None,
+        exception: Optional[Exception] = None
+    ):
+        """Mostra falha de uma tentativa e se haverá nova tentativa"""
+        if exception is not None:
+            logger.error("Tentativa %d falhou com exceção: %s", attempt + 1, exception)
+        else:
+            logger.warning("Tentativa %d retornou erro: %s", attempt + 1, error_message)
+        if attempt < self.max_retries - 1:
+            logger.info("[RETRY] Tentando novamente...")
+
+    def _record_failure(self) -> TranslationResult:
+        """Todas as tentativas falharam"""
+        self.strategy.add_stats(errors=1)
         return TranslationResult(
             success=False,
             translated_segments={},
             error_message="Todas as tentativas falharam"
         )
 
-    def _apply_translations(self, parsed_doc: ParsedDocument, translations: Dict[str, str]):
-        """Aplica traduções de volta aos segmentos do documento"""
-
-        segment_map = {}
-
-        # Criar mapeamento id -> segmento
-        def map_recursive(node: ParsedNode):
-            segment_id = 0
-            for segment in node.text_segments:
-                if segment.text_type in [TextType.ENGLISH, TextType.GLOSS]:
-                    segment_map[f"seg_{segment_id}"] = segment
-                    segment_id += 1
-
-            for child in node.children:
-                map_recursive(child)
-
-        # Mapear todos os segmentos
-        segment_id_counter = 0
-        for node in parsed_doc.nodes:
-            for segment in node.text_segments:
-                if segment.text_type in [TextType.ENGLISH, TextType.GLOSS]:
-                    segment_id = f"seg_{segment_id_counter}"
-                    if segment_id in translations:
-                        segment.text = translations[segment_id]
-                    segment_id_counter += 1
-
-            def apply_recursive(node: ParsedNode):
-                nonlocal segment_id_counter
-                for child in node.children:
-                    for segment in child.text_segments:
-                        if segment.text_type in [TextType.ENGLISH, TextType.GLOSS]:
-                            segment_id = f"seg_{segment_id_counter}"
-                            if segment_id in translations:
-                                segment.text = translations[segment_id]
-                            segment_id_counter += 1
-                    apply_recursive(child)
-
-            apply_recursive(node)
+    @staticmethod
+    def _segment_setter(section: SectionData) -> Callable[[str, str], None]:
+        """
+        Aplica uma tradução (seg_N) ao segmento do documento assim que ela chega
+
+        Com respostas em streaming, o documento vai sendo traduzido enquanto o
+        resto da resposta ainda está na rede; _apply_translations no final
+        cobre o que veio de cache ou de traduções já conhecidas.
+        """
+        refs = section.segment_refs
+
+        def set_text(seg_id: str, text: str):
+            index = seg_id[4:] if seg_id.startswith("seg_") else ""
+            if index.isdigit() and int(index) < len(refs):
+                refs[int(index)].text = text
+
+        return set_text
+
+    def _apply_translations(self, section: SectionData, translations: Dict[str, str]):
+        """
+        Aplica traduções de volta aos segmentos do documento
+
+        Os segmentos foram guardados na extração na ordem dos IDs (seg_N é
+        `section.segment_refs[N]`), então não há nova travessia da árvore.
+        """
+        for index, segment in enumerate(section.segment_refs):
+            text = translations.get(f"seg_{index}")
+            if text is not None:
+                segment.text = text
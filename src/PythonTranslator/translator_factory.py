@@ -1,10 +1,52 @@
 """
 Factory para criar instâncias de tradutores
+
+Os módulos dos provedores (e seus SDKs) só são importados quando o provedor
+é criado pela primeira vez.
 """
-from typing import Optional, Dict
+import functools
+import importlib
+from typing import Optional, Dict, Tuple
+from glossary import get_glossary, format_glossary_for_prompt, build_glossary_index
+from translation_cache import glossary_digest
 from translation_strategy import TranslationStrategy
-from gemini_translator import GeminiTranslator
-from claude_translator import ClaudeTranslator
+
+
+# Provedor -> (módulo, classe, modelo padrão)
+_REGISTRY: Dict[str, Tuple[str, str, str]] = {
+    "gemini": ("gemini_translator", "GeminiTranslator", "gemini-3-pro-preview"),
+    "claude": ("claude_translator", "ClaudeTranslator", "claude-3-5-sonnet-20241022"),
+}
+
+
+@functools.lru_cache(maxsize=1)
+def _default_glossary_inputs() -> Tuple[str, str, Dict[str, str]]:
+    """Texto, hash e índice do glossário padrão (calculados uma vez por processo)"""
+    glossary = get_glossary()
+    return (
+        format_glossary_for_prompt(glossary),
+        glossary_digest(glossary),
+        build_glossary_index(glossary)
+    )
+
+
+def _glossary_inputs(glossary: Optional[Dict[str, str]]) -> Tuple[str, str, Dict[str, str]]:
+    """
+    Formata o glossário, calcula seu hash e monta o índice de busca uma única vez por criação
+
+    Args:
+        glossary: Glossário customizado (padrão se None ou vazio)
+
+    Returns:
+        (texto para o prompt, hash para as chaves de cache, índice case-insensitive)
+    """
+    if not glossary:
+        return _default_glossary_inputs()
+    return (
+        format_glossary_for_prompt(glossary),
+        glossary_digest(glossary),
+        build_glossary_index(glossary)
+    )
 
 
 class TranslatorFactory:
@@ -20,7 +62,8 @@ class TranslatorFactory:
         provider: str,
         api_key: str,
         model_name: Optional[str] = None,
-        glossary: Optional[Dict[str, str]] = None
+        glossary: Optional[Dict[str, str]] = None,
+        structured_output: bool = False
     ) -> TranslationStrategy:
         """
         Cria instância de tradutor baseado no provedor
@@ -30,6 +73,8 @@ class TranslatorFactory:
             api_key: Chave da API
             model_name: Nome do modelo (opcional, usa padrão do provedor)
             glossary: Glossário customizado (opcional)
+            structured_output: Usa a saída estruturada nativa do provedor
+                (response_schema no Gemini, tool use no Claude)
 
         Returns:
             Instância de TranslationStrategy
@@ -39,20 +84,26 @@ class TranslatorFactory:
         """
         provider = provider.lower()
 
-        if provider == "gemini":
-            model = model_name or "gemini-3-pro-preview"
-            return GeminiTranslator(api_key, model, glossary)
-
-        elif provider == "claude":
-            model = model_name or "claude-3-5-sonnet-20241022"
-            return ClaudeTranslator(api_key, model, glossary)
-
-        else:
+        entry = _REGISTRY.get(provider)
+        if entry is None:
             raise ValueError(
                 f"Provedor '{provider}' não suportado. "
                 f"Opções: {', '.join(TranslatorFactory.SUPPORTED_PROVIDERS.keys())}"
             )
 
+        module_name, class_name, default_model = entry
+        translator_class = getattr(importlib.import_module(module_name), class_name)
+        glossary_text, glossary_hash, glossary_index = _glossary_inputs(glossary)
+        return translator_class(
+            api_key,
+            model_name or default_model,
+            glossary,
+            glossary_text=glossary_text,
+            glossary_hash=glossary_hash,
+            structured_output=structured_output,
+            glossary_index=glossary_index
+        )
+
     @staticmethod
     def list_providers() -> Dict[str, str]:
         """
@@ -71,10 +122,7 @@ class TranslatorFactory:
         Returns:
             Dicionário {provedor: modelo_padrão}
         """
-        return {
-            "gemini": "gemini-3-pro-preview",
-            "claude": "claude-3-5-sonnet-20241022"
-        }
+        return {provider: entry[2] for provider, entry in _REGISTRY.items()}
 
     @staticmethod
     def get_available_models(provider: str) -> list:
@@ -2,19 +2,42 @@
 Gerador de documentos Word (versão simples para testes)
 NOTA: Versão definitiva será em .NET com DocumentFormat.OpenXml
 """
+import logging
+from functools import partial
 from docx import Document
 from docx.shared import Pt, Inches, RGBColor
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from models import ParsedDocument, ParsedNode, NodeType, TextType
-from typing import Optional
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# Tipos de nó que ocupam uma célula da tabela
+_CELL_TYPES = frozenset({NodeType.TABLE_CELL, NodeType.TABLE_HEADER})
+
+# Filhos de parágrafo escritos como runs do próprio parágrafo
+_INLINE_TYPES = frozenset({NodeType.STRONG, NodeType.EMPHASIS})
 
 
 class SimpleWordGenerator:
     """Gerador simples de Word para testes"""
 
     def __init__(self):
-        self.doc = Document()
-        self._setup_styles()
+        self.doc = None
+        self._text_cache: Dict[int, str] = {}  # id(nó) -> texto, por documento
+
+        # Tipo de nó -> método que o escreve (demais tipos só têm os filhos processados)
+        self._handlers: Dict[NodeType, Callable[[ParsedNode], None]] = {
+            NodeType.HEADING_2: partial(self._add_heading, level=1),
+            NodeType.HEADING_3: partial(self._add_heading, level=2),
+            NodeType.HEADING_4: partial(self._add_heading, level=3),
+            NodeType.PARAGRAPH: self._add_paragraph,
+            NodeType.LIST_ORDERED: partial(self._add_list, ordered=True),
+            NodeType.LIST_UNORDERED: partial(self._add_list, ordered=False),
+            NodeType.TABLE: self._add_table,
+            NodeType.BLOCKQUOTE: self._add_blockquote,
+        }
 
     def _setup_styles(self):
         """Configura estilos básicos do documento"""
@@ -38,9 +61,9 @@ class SimpleWordGenerator:
             parsed_doc: Documento parseado e traduzido
             output_path: Caminho para salvar .docx
         """
-        print(f"\n{'='*80}")
-        print(f"GERANDO DOCUMENTO WORD")
-        print(f"{'='*80}\n")
+        self.doc = Document()
+        self._setup_styles()
+        self._text_cache = {}
 
         # Título do documento
         title = self.doc.add_heading(parsed_doc.title, level=0)
@@ -63,36 +86,13 @@ class SimpleWordGenerator:
         # Salvar
         self.doc.save(output_path)
 
-        print(f"[OK] Documento salvo: {output_path}")
-        print(f"  - Nós processados: {nodes_processed}")
-        print(f"{'='*80}\n")
+        logger.info("[OK] Documento salvo: %s | nós processados: %d", output_path, nodes_processed)
 
     def _process_node(self, node: ParsedNode, level: int = 0):
         """Processa um nó recursivamente"""
-
-        if node.node_type == NodeType.HEADING_2:
-            self._add_heading(node, level=1)
-
-        elif node.node_type == NodeType.HEADING_3:
-            self._add_heading(node, level=2)
-
-        elif node.node_type == NodeType.HEADING_4:
-            self._add_heading(node, level=3)
-
-        elif node.node_type == NodeType.PARAGRAPH:
-            self._add_paragraph(node)
-
-        elif node.node_type == NodeType.LIST_ORDERED:
-            self._add_list(node, ordered=True)
-
-        elif node.node_type == NodeType.LIST_UNORDERED:
-            self._add_list(node, ordered=False)
-
-        elif node.node_type == NodeType.TABLE:
-            self._add_table(node)
-
-        elif node.node_type == NodeType.BLOCKQUOTE:
-            self._add_blockquote(node)
+        handler = self._handlers.get(node.node_type)
+        if handler is not None:
+            handler(node)
 
         # Processar filhos
         for child in node.children:
@@ -117,38 +117,37 @@ class SimpleWordGenerator:
             run.bold = True
 
         # Adicionar segmentos de texto
+        add_run = para.add_run
+        latin = TextType.LATIN
         for segment in node.text_segments:
-            run = para.add_run(segment.text)
+            run = add_run(segment.text)
+            formatting = segment.formatting
 
-            # Aplicar formatação
-            if segment.formatting.bold:
+            # Aplicar formatação (latim sempre em itálico)
+            if formatting.bold:
                 run.bold = True
-            if segment.formatting.italic:
+            if formatting.italic or segment.text_type == latin:
                 run.italic = True
 
-            # Destacar latim (opcional)
-            if segment.text_type == TextType.LATIN:
-                run.italic = True  # Latim sempre em itálico
-
         # Se tiver filhos inline, processar
         for child in node.children:
-            if child.node_type in [NodeType.STRONG, NodeType.EMPHASIS]:
+            if child.node_type in _INLINE_TYPES:
                 self._add_inline_to_paragraph(para, child)
 
     def _add_inline_to_paragraph(self, para, node: ParsedNode):
         """Adiciona conteúdo inline a um parágrafo existente"""
-        for segment in node.text_segments:
-            run = para.add_run(segment.text)
+        # Formatação do próprio nó vale para todos os segmentos
+        strong = node.node_type == NodeType.STRONG
+        emphasis = node.node_type == NodeType.EMPHASIS
 
-            if node.node_type == NodeType.STRONG:
-                run.bold = True
-            elif node.node_type == NodeType.EMPHASIS:
-                run.italic = True
+        add_run = para.add_run
+        for segment in node.text_segments:
+            run = add_run(segment.text)
+            formatting = segment.formatting
 
-            # Aplicar formatação adicional
-            if segment.formatting.bold:
+            if strong or formatting.bold:
                 run.bold = True
-            if segment.formatting.italic:
+            if emphasis or formatting.italic:
                 run.italic = True
 
     def _add_list(self, node: ParsedNode, ordered: bool = False):
@@ -163,14 +162,17 @@ class SimpleWordGenerator:
 
     def _add_table(self, node: ParsedNode):
         """Adiciona tabela simples"""
-        # Contar linhas e colunas
-        rows = [child for child in node.children if child.node_type == NodeType.TABLE_ROW]
+        # Células de cada linha, em uma passada pelos filhos
+        rows = [
+            [c for c in child.children if c.node_type in _CELL_TYPES]
+            for child in node.children
+            if child.node_type == NodeType.TABLE_ROW
+        ]
         if not rows:
             return
 
-        # Pegar número de colunas da primeira linha
-        first_row = rows[0]
-        cols = len([c for c in first_row.children if c.node_type in [NodeType.TABLE_CELL, NodeType.TABLE_HEADER]])
+        # Número de colunas vem da primeira linha
+        cols = len(rows[0])
 
         if cols == 0:
             return
@@ -179,19 +181,17 @@ class SimpleWordGenerator:
         table = self.doc.add_table(rows=len(rows), cols=cols)
         table.style = 'Light Grid Accent 1'
 
-        # Preencher células
-        for i, row_node in enumerate(rows):
-            cells = [c for c in row_node.children if c.node_type in [NodeType.TABLE_CELL, NodeType.TABLE_HEADER]]
-            for j, cell_node in enumerate(cells):
-                if j < cols:
-                    text = self._get_node_text(cell_node)
-                    table.rows[i].cells[j].text = text
+        # Preencher células (rows/cells do python-docx percorrem o XML a cada acesso)
+        for cells, doc_row in zip(rows, table.rows):
+            doc_cells = doc_row.cells
+            for cell_node, doc_cell in zip(cells[:cols], doc_cells):
+                text = self._get_node_text(cell_node)
 
-                    # Se for header, deixar em negrito
-                    if cell_node.node_type == NodeType.TABLE_HEADER:
-                        for paragraph in table.rows[i].cells[j].paragraphs:
-                            for run in paragraph.runs:
-                                run.bold = True
+                if cell_node.node_type == NodeType.TABLE_HEADER:
+                    # Header: o run já nasce em negrito no parágrafo vazio da célula nova
+                    doc_cell.paragraphs[0].add_run(text).bold = True
+                else:
+                    doc_cell.text = text
 
     def _add_blockquote(self, node: ParsedNode):
         """Adiciona citação/nota"""
@@ -204,15 +204,20 @@ class SimpleWordGenerator:
                 run.italic = True
 
     def _get_node_text(self, node: ParsedNode) -> str:
-        """Extrai texto completo de um nó"""
-        texts = []
+        """Extrai texto completo de um nó (uma passada, sem junções intermediárias)"""
+        cached = self._text_cache.get(id(node))
+        if cached is not None:
+            return cached
 
-        for segment in node.text_segments:
-            texts.append(segment.text)
+        texts = []
+        stack = [node]
 
-        for child in node.children:
-            child_text = self._get_node_text(child)
-            if child_text:
-                texts.append(child_text)
+        while stack:
+            current = stack.pop()
+            for segment in current.text_segments:
+                texts.append(segment.text)
+            stack.extend(reversed(current.children))
 
-        return ' '.join(texts).strip()
+        # Listas aninhadas e células são lidas de novo quando a recursão chega nelas
+        text = self._text_cache[id(node)] = ' '.join(texts).strip()
+        return text
@@ -0,0 +1,18 @@
+"""
+Entrypoint WSGI para produção (gunicorn + workers gevent)
+
+O monkey-patch do gevent precisa rodar antes de qualquer outro import para que
+os sockets usados pelos SDKs (anthropic/httpx, google-generativeai) sejam
+cooperativos: enquanto uma requisição espera a resposta da IA, o worker atende
+outras.
+
+Uso:
+    gunicorn -k gevent -w 2 --worker-connections 200 -b 0.0.0.0:5001 wsgi:app
+"""
+from gevent import monkey
+
+monkey.patch_all()
+
+from app import app  # noqa: E402
+
+__all__ = ["app"]